@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import json
+import platform
+import re
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+from sanic_openapi3 import main as openapi
+from benchmarks.apps import make_app
+
+SIZES = (10, 100, 1000, 10000)
+_CONTENT_LENGTH = re.compile(rb'content-length:\s*(\d+)', re.IGNORECASE)
+
+
+def run(routes: int, requests: int) -> dict:
+    started = time.perf_counter()
+    app = make_app(routes)
+    phases = {'app': time.perf_counter() - started}
+    result = {'routes': routes, 'phases': phases}
+
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+
+    async def measure(app, loop):
+        # The specification was built by the blueprint listener when the server started, exactly as in
+        # production; its phases are the ones reported on the /_stats endpoint.
+        try:
+            phases.update(openapi.registry(app).stats.phases)
+
+            for name, headers in (('identity', {}), ('gzip', {'Accept-Encoding': 'gzip'})):
+                elapsed = await load(sock.getsockname()[1], requests, headers)
+                result['requests_per_second_%s' % name] = requests / elapsed
+        finally:
+            app.stop()
+
+    app.register_listener(measure, 'after_server_start')
+    app.run(sock=sock, access_log=False)
+
+    document = openapi.registry(app).document
+    result.update({
+        'total': sum(v for k, v in phases.items() if k != 'app'),
+        'peak_memory': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        'spec_bytes': len(document.body),
+        'spec_bytes_gzip': len(document.variants.get('gzip', b'')),
+    })
+
+    return result
+
+
+async def load(port: int, requests: int, headers: dict) -> float:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    request = ('GET /openapi.json HTTP/1.1\r\nHost: localhost\r\n%s\r\n' % ''.join(
+        '%s: %s\r\n' % x for x in headers.items()
+    )).encode()
+
+    started = time.perf_counter()
+
+    for _ in range(requests):
+        writer.write(request)
+        head = await reader.readuntil(b'\r\n\r\n')
+        await reader.readexactly(int(_CONTENT_LENGTH.search(head).group(1)))
+
+    elapsed = time.perf_counter() - started
+    writer.close()
+
+    return elapsed
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, path: str):
+    with open(path) as fh:
+        previous = {x['routes']: x for x in json.load(fh)['results']}
+
+    for result in report['results']:
+        before = previous.get(result['routes'])
+
+        if not before:
+            continue
+
+        sys.stderr.write('%6d routes: total %.3fs -> %.3fs (%+.1f%%), peak memory %d -> %d bytes\n' % (
+            result['routes'],
+            before['total'],
+            result['total'],
+            (result['total'] / before['total'] - 1) * 100,
+            before['peak_memory'],
+            result['peak_memory'],
+        ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark sanic-openapi3 spec builds.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='numbers of routes to generate')
+    parser.add_argument('--requests', type=int, default=200, help='spec requests over HTTP to time per size')
+    parser.add_argument('--output', help='file to write the JSON results to (default: stdout)')
+
+    parser.add_argument('--compare', help='previous JSON results to compare the totals with')
+    parser.add_argument('--run', type=int, help=argparse.SUPPRESS)
+
+    args = parser.parse_args(argv)
+
+    if args.run:
+        sys.stdout.write(json.dumps(run(args.run, args.requests)) + '\n')
+        return
+
+    # Each size runs in a fresh interpreter: the schema caches are module globals and peak memory
+    # must not include the previous runs.
+    results = []
+
+    for size in args.sizes:
+        command = [sys.executable, '-m', 'benchmarks', '--run', str(size), '--requests', str(args.requests)]
+        output = subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout
+
+        results.append(json.loads(output.decode().strip().splitlines()[-1]))
+
+    report = {
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+    if args.compare:
+        compare(report, args.compare)
+
+    output = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output)
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import datetime
+
+from sanic import Sanic, Blueprint
+from sanic.response import json
+from sanic.views import CompositionView
+from sanic_openapi3 import openapi, blueprint
+
+
+def make_models(count: int, depth: int = 3) -> list:
+    models = []
+
+    for i in range(count):
+        fields = {
+            'id': int,
+            'name': str,
+            'price': float,
+            'active': bool,
+            'created': datetime.datetime,
+        }
+
+        if i % depth:
+            fields['parent'] = models[-1]
+            fields['children'] = [models[-1]]
+
+        models.append(type('Model%d' % i, (), fields))
+
+    return models
+
+
+def make_handler(name: str, model: type, parameter: bool):
+    async def handler(request, **kwargs):
+        return json({})
+
+    handler.__name__ = handler.__qualname__ = name
+
+    openapi.summary('Handler %s' % name)(handler)
+    openapi.description('Synthetic handler %s for benchmarks' % name)(handler)
+    openapi.response(200, model)(handler)
+    openapi.response(404, {'error': str, 'code': int})(handler)
+
+    if parameter:
+        openapi.parameter('limit', int)(handler)
+        openapi.body(model, description='Payload')(handler)
+
+    return handler
+
+
+def make_app(routes: int, blueprints: int = 10, models: int = 50, views: float = 0.1, name: str = None) -> Sanic:
+    app = Sanic(name or 'bench_%d' % routes)
+    _models = make_models(models)
+    _blueprints = [Blueprint('bp%d' % i, url_prefix='/bp%d' % i) for i in range(max(1, blueprints))]
+    _views = int(routes * views)
+
+    for i in range(routes):
+        target = _blueprints[i % len(_blueprints)]
+        model = _models[i % len(_models)]
+
+        if i < _views:
+            view = CompositionView()
+            view.add(['GET'], make_handler('view_get_%d' % i, model, False))
+            view.add(['POST'], make_handler('view_post_%d' % i, model, True))
+            target.add_route(view, '/views/%d/<item_id:int>' % i, name='view_%d' % i)
+        else:
+            handler = make_handler('route_%d' % i, model, i % 2 == 0)
+            target.add_route(handler, '/items/%d/<item_id:int>/<tag>' % i, methods=['GET', 'PUT'])
+
+    for _blueprint in _blueprints:
+        app.blueprint(_blueprint)
+
+    app.blueprint(blueprint)
+
+    return app
@@ -20,7 +20,7 @@ def todo_list(request):
 @openapi.summary("Fetches a todo item by ID")
 @openapi.response(200, Todo)
 def todo_get(request, todo_id):
-    return json(test_todo)
+    return openapi.respond(request, 200, test_todo)
 
 
 @todos.put("/<todo_id:int>", strict_slashes=True)
@@ -0,0 +1,28 @@
+import argparse
+import importlib
+import os
+import sys
+
+from sanic_openapi3.main import export
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='sanic-openapi3', description='Build the OpenAPI specification of a Sanic app.'
+    )
+    parser.add_argument('app', help='application to document, as "module:attribute" (attribute defaults to "app")')
+    parser.add_argument(
+        'output', help='file to write the serialized specification to, as YAML for .yaml and .yml files'
+    )
+    parser.add_argument('--stream', action='store_true', help='write the specification in chunks instead of one string')
+
+    args = parser.parse_args(argv)
+    module, _, attribute = args.app.partition(':')
+
+    sys.path.insert(0, os.getcwd())
+
+    export(getattr(importlib.import_module(module), attribute or 'app'), args.output, stream=args.stream)
+
+
+if __name__ == '__main__':
+    main()
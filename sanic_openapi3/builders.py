@@ -1,5 +1,21 @@
-from collections import defaultdict
+import copy
+import hashlib
+import json
+import threading
+
+from collections import defaultdict, Counter
+from typing import Callable, Optional, Set, Tuple, Union
+from weakref import WeakKeyDictionary
 from sanic_openapi3.definitions import *
+from sanic_openapi3.documents import Document, FailedDocument, LazyDocument, PendingDocument, StreamingDocument
+from sanic_openapi3.parallel import build_fragments
+from sanic_openapi3.types import recursive_schemas, model_schemas, release
+from sanic_openapi3.serializers import compile_encoder
+from sanic_openapi3.slices import SpecIndex
+from sanic_openapi3.stats import BuildStats
+from sanic_openapi3.validation import compile_validator
+
+_lock = threading.RLock()
 
 
 class ComponentsBuilder:
@@ -10,8 +26,10 @@ class ComponentsBuilder:
     _requestBodies: Dict[str, RequestBody]
     _schemas: Dict[str, Schema]
     _security: Dict[str, SecurityScheme]
+    _parent: Optional['ComponentsBuilder']
 
-    def __init__(self):
+    def __init__(self, parent: 'ComponentsBuilder' = None):
+        self._parent = parent
         self._headers = {}
         self._examples = {}
         self._parameters = {}
@@ -27,6 +45,9 @@ class ComponentsBuilder:
         if section == 'schema' and content.__name__ in self._schemas.keys():
             return Reference("#/components/schemas/%s" % content.__name__)
 
+        if self._parent is not None:
+            return self._parent.maybe_ref(content, section)
+
         return content
 
     def header(self, name: str, value: Header):
@@ -44,14 +65,92 @@ class ComponentsBuilder:
     def body(self, name: str, value: RequestBody):
         self._requestBodies[name] = value
 
-    def schema(self, name: str, value: Schema):
+    def schema(self, name: str, value: Any):
         self._schemas[name] = value
 
     def security(self, name: str, value: SecurityScheme):
         self._security[name] = value
 
-    def build(self):
-        return Components(schemas=self._schemas, securitySchemes=self._security)
+    def schemas(self) -> Dict[str, Schema]:
+        self.resolve()
+
+        if self._parent is not None:
+            return {**self._parent.schemas(), **self._schemas}
+
+        return dict(self._schemas)
+
+    def securities(self) -> Dict[str, SecurityScheme]:
+        if self._parent is not None:
+            return {**self._parent.securities(), **self._security}
+
+        return dict(self._security)
+
+    def resolve(self):
+        for name, value in self._schemas.items():
+            if not isinstance(value, Definition):
+                self._schemas[name] = Schema.make(value)
+
+    def release(self):
+        for value in self._schemas.values():
+            if isinstance(value, Definition):
+                value.release()
+
+        if self._parent is not None:
+            self._parent.release()
+        else:
+            release()
+
+    def serialized_schemas(self) -> Dict[str, Dict]:
+        return {k: v.serialize() for k, v in {**recursive_schemas(), **self.schemas()}.items()}
+
+    def build(self, paths: Any = None, recursive: Dict[str, Any] = None):
+        schemas = self.schemas()
+        recursive = {**(recursive or {}), **recursive_schemas()}
+
+        if recursive:
+            # Recursive models are registered process-wide; only those this specification refers to belong to it.
+            pending = list(_references([paths, schemas]))
+
+            while pending:
+                name = pending.pop()
+
+                if name in recursive and name not in schemas:
+                    schemas[name] = recursive[name]
+                    pending.extend(_references(recursive[name]))
+
+        return Components(schemas=schemas, securitySchemes=self.securities())
+
+    def extract(self, spec: Dict, threshold: int = 1) -> Dict:
+        schemas = spec.setdefault('components', {}).setdefault('schemas', {})
+        counts = Counter()
+        nodes = {}
+
+        for node in _schema_nodes(spec):
+            if _is_extractable(node):
+                key = _structure(node)
+                counts[key] += 1
+                nodes.setdefault(key, node)
+
+        refs = {_structure(v): k for k, v in schemas.items()}
+        names = {_structure(v.serialize()): k for k, v in model_schemas().items()}
+        found = {}
+
+        for key, count in counts.items():
+            if key in refs or count <= threshold:
+                continue
+
+            name = names.get(key) or 'Schema%s' % hashlib.sha1(key.encode()).hexdigest()[:8]
+
+            while name in schemas or name in found:
+                name += '_'
+
+            found[name] = key
+            refs[key] = name
+
+        for name, key in found.items():
+            schemas[name] = nodes[key]
+
+        return _replace_refs(spec, refs)
 
 
 class OperationBuilder:
@@ -65,13 +164,19 @@ class OperationBuilder:
     parameters: List[Parameter]
     responses: Dict[str, Response]
     callbacks: List[str]  # TODO
+    encoders: Dict[str, Callable]
+    _pending: List[Tuple[str, Any, tuple, dict]]
     deprecated: bool = False
+    validated: bool = False
+    validator: Callable = None
 
     def __init__(self):
         self.tags = []
         self.security = []
         self.parameters = []
         self.responses = {}
+        self.encoders = {}
+        self._pending = []
 
     def name(self, value: str):
         self.operationId = value
@@ -93,13 +198,59 @@ class OperationBuilder:
     def deprecate(self):
         self.deprecated = True
 
+    def validate(self):
+        self.validated = True
+
+    def compile(self, schemas: Dict[str, Dict]) -> Callable:
+        with _lock:
+            if self.validator is None:
+                self.validator = compile_validator(self.build().serialize(), schemas, name='validate_%s' % id(self))
+
+        return self.validator
+
+    def encoder(self, status, schemas: Callable[[], Dict[str, Dict]], dumps: Callable = None) -> Optional[Callable]:
+        if status in self.encoders:
+            return self.encoders[status]
+
+        response = self.responses.get(status, self.responses.get(str(status)))
+        content = response.serialize().get('content') or {} if response else {}
+        media = content.get('application/json') or content.get('*/*') or {}
+
+        if media.get('schema'):
+            self.encoders[status] = compile_encoder(media['schema'], schemas(), 'encode_%s' % status, dumps)
+        else:
+            self.encoders[status] = None
+
+        return self.encoders[status]
+
     def body(self, content: Any, **kwargs):
-        self.requestBody = RequestBody.make(content, **kwargs)
+        self._pending.append(('_body', content, (), kwargs))
 
     def parameter(self, name: str, schema: Any, location: str = 'query', **kwargs):
-        self.parameters.append(Parameter.make(name, schema, location, **kwargs))
+        self._pending.append(('_parameter', schema, (name, location), kwargs))
 
     def response(self, status, content: Any = None, description: str = None, **kwargs):
+        self._pending.append(('_response', content, (status, description), kwargs))
+
+    def resolve(self, components: ComponentsBuilder):
+        if not self._pending:
+            return
+
+        # Requests and a background build may resolve the same operation from different threads; the records
+        # are only dropped once applied, so nobody sees a half resolved operation.
+        with _lock:
+            for method, content, args, kwargs in self._pending:
+                getattr(self, method)(components.maybe_ref(content), *args, **kwargs)
+
+            self._pending = []
+
+    def _body(self, content: Any, **kwargs):
+        self.requestBody = RequestBody.make(content, **kwargs)
+
+    def _parameter(self, schema: Any, name: str, location: str, **kwargs):
+        self.parameters.append(Parameter.make(name, schema, location, **kwargs))
+
+    def _response(self, content: Any, status, description: str, **kwargs):
         self.responses[status] = Response.make(content, description, **kwargs)
 
     def secured(self, *args, **kwargs):
@@ -112,13 +263,29 @@ class OperationBuilder:
 
         self.security.append(gates)
 
+    def copy(self) -> 'OperationBuilder':
+        clone = copy.copy(self)
+        clone.tags = list(self.tags)
+        clone.security = list(self.security)
+        clone.parameters = list(self.parameters)
+        clone.responses = dict(self.responses)
+        clone.encoders = {}
+        clone._pending = list(self._pending)
+
+        return clone
+
     def build(self):
         return Operation(**self.__dict__)
 
 
-class OperationsBuilder(defaultdict):
-    def __init__(self):
-        super().__init__(OperationBuilder)
+class OperationsBuilder(WeakKeyDictionary):
+    def __getitem__(self, handler: Callable) -> OperationBuilder:
+        operation = self.get(handler)
+
+        if operation is None:
+            operation = self[handler] = OperationBuilder()
+
+        return operation
 
 
 class SpecificationBuilder:
@@ -132,11 +299,15 @@ class SpecificationBuilder:
     _paths: Dict[str, Dict[str, OperationBuilder]]
     _tags: Dict[str, Tag]
     _components: ComponentsBuilder
+    _fragments: Dict[str, Dict]
+    _recursive: Dict[str, Dict]
 
     def __init__(self, components: ComponentsBuilder):
         self._components = components
         self._paths = defaultdict(dict)
         self._tags = {}
+        self._fragments = {}
+        self._recursive = {}
 
     def url(self, value: str):
         self._url = value
@@ -164,13 +335,81 @@ class SpecificationBuilder:
             self._tags[_tag] = Tag(_tag)
 
         self._paths[path][method.lower()] = operation
+        self._fragments.pop(path, None)
+
+    def reset(self):
+        self._paths = defaultdict(dict)
+        self._fragments = {}
+        self._recursive = {}
+
+    def release(self):
+        self.reset()
+        self._components.release()
+
+    def remove(self, path: str, method: str = None):
+        operations = self._paths.get(path, {})
+
+        if method:
+            operations.pop(method.lower(), None)
 
-    def build(self) -> OpenAPI:
-        info = self._build_info()
-        paths = self._build_paths()
-        tags = self._build_tags()
+        if not method or not operations:
+            self._paths.pop(path, None)
 
-        return OpenAPI(info, paths, tags=tags, components=self._components.build())
+        self._fragments.pop(path, None)
+
+    def serialize(self, stats: BuildStats = None, workers: int = 0) -> Dict:
+        stats = stats or BuildStats()
+        paths = {}
+
+        with stats.phase('operations'):
+            missing = [x for x in self._paths if x not in self._fragments]
+
+            if workers > 1 and len(missing) > workers:
+                fragments, recursive = build_fragments(self, missing, workers)
+                self._fragments.update(fragments)
+                self._recursive.update(recursive)
+
+            for path, operations in self._paths.items():
+                fragment = self._fragments.get(path)
+
+                if fragment is None:
+                    fragment = self._fragments[path] = self._build_path(operations).serialize()
+
+                paths[path] = fragment
+
+            info = self._build_info()
+            tags = self._build_tags()
+
+        with stats.phase('components'):
+            # Recursive models met in the workers were only registered there.
+            components = self._components.build(paths, self._recursive)
+
+        with stats.phase('serialization'):
+            spec = OpenAPI(info, {}, tags=tags, components=components).serialize()
+            spec['paths'] = paths
+
+        stats.count('paths', len(paths))
+        stats.count('operations', sum(len(x) for x in self._paths.values()))
+        stats.count('tags', len(tags))
+
+        return spec
+
+    def build(self, stats: BuildStats = None) -> OpenAPI:
+        stats = stats or BuildStats()
+
+        with stats.phase('operations'):
+            info = self._build_info()
+            paths = self._build_paths()
+            tags = self._build_tags()
+
+        with stats.phase('components'):
+            components = self._components.build(paths)
+
+        stats.count('paths', len(paths))
+        stats.count('operations', sum(len(x) for x in self._paths.values()))
+        stats.count('tags', len(tags))
+
+        return OpenAPI(info, paths, tags=tags, components=components)
 
     def _build_info(self) -> Info:
         kwargs = {
@@ -189,6 +428,171 @@ class SpecificationBuilder:
         paths = {}
 
         for path, operations in self._paths.items():
-            paths[path] = PathItem(**{k: v.build() for k, v in operations.items()})
+            paths[path] = self._build_path(operations)
 
         return paths
+
+    def _build_path(self, operations: Dict[str, OperationBuilder]) -> PathItem:
+        for operation in operations.values():
+            operation.resolve(self._components)
+
+        return PathItem(**{k: v.build() for k, v in operations.items()})
+
+
+class Registry:
+    components: ComponentsBuilder
+    specification: SpecificationBuilder
+    endpoints: Dict[Tuple[str, str], OperationBuilder]
+    tags: Dict[Callable, str]
+    indexed: bool
+    collected: bool
+    document: Optional[Union[Document, LazyDocument, PendingDocument, FailedDocument, StreamingDocument]]
+    stats: BuildStats
+    index: Optional[SpecIndex]
+    yaml: Optional[Document]
+
+    def __init__(self, components: ComponentsBuilder):
+        self.components = ComponentsBuilder(components)
+        self.specification = SpecificationBuilder(self.components)
+        self.endpoints = {}
+        self.tags = {}
+        self.indexed = False
+        self.collected = False
+        self.document = None
+        self.stats = BuildStats()
+        self.index = None
+        self.yaml = None
+
+    def serve(self, document: Union[Document, LazyDocument, PendingDocument, FailedDocument, StreamingDocument],
+              stats: BuildStats = None):
+        # The slice index and the YAML document are derived from the served document, so they go with it.
+        self.document = document
+        self.stats = stats or BuildStats()
+        self.index = None
+        self.yaml = None
+
+    def release(self):
+        self.specification.release()
+        self.endpoints.clear()
+        self.indexed = False
+        self.collected = False
+
+
+_SCHEMA_LISTS = ('oneOf', 'anyOf', 'allOf')
+_SCHEMA_REF = '#/components/schemas/'
+
+
+def _references(value: Any) -> Set[str]:
+    names, seen, stack = set(), set(), [value]
+
+    while stack:
+        item = stack.pop()
+
+        # Definitions and their serialized dicts are shared between parents, so each one is scanned once. The
+        # fields are scanned instead of serializing, which would leave a serialized copy cached on every node.
+        if isinstance(item, (Definition, dict, list)):
+            if id(item) in seen:
+                continue
+
+            seen.add(id(item))
+
+        if isinstance(item, Definition):
+            stack.append(item.fields)
+        elif isinstance(item, dict):
+            ref = item.get('$ref')
+
+            if isinstance(ref, str) and ref.startswith(_SCHEMA_REF):
+                names.add(ref[len(_SCHEMA_REF):])
+
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+
+    return names
+
+
+def _structure(node: Dict) -> str:
+    return json.dumps(node, sort_keys=True, separators=(',', ':'))
+
+
+def _is_extractable(node: Any) -> bool:
+    return isinstance(node, dict) and node.get('type') == 'object' and bool(node.get('properties'))
+
+
+def _schema_children(node: Dict):
+    for key, value in node.items():
+        if key in ('items', 'additionalProperties', 'not') and isinstance(value, dict):
+            yield value
+        elif key == 'properties' and isinstance(value, dict):
+            yield from value.values()
+        elif key in _SCHEMA_LISTS and isinstance(value, list):
+            yield from value
+
+
+def _schema_nodes(value: Any, is_schema: bool = False):
+    if isinstance(value, list):
+        for item in value:
+            yield from _schema_nodes(item)
+    elif isinstance(value, dict):
+        if is_schema:
+            yield value
+
+            for child in _schema_children(value):
+                yield from _schema_nodes(child, True)
+
+            return
+
+        for key, child in value.items():
+            if key == 'schema':
+                yield from _schema_nodes(child, True)
+            elif key == 'schemas' and isinstance(child, dict):
+                for schema in child.values():
+                    for nested in _schema_children(schema) if isinstance(schema, dict) else ():
+                        yield from _schema_nodes(nested, True)
+            else:
+                yield from _schema_nodes(child)
+
+
+def _replace_schema(node: Any, refs: Dict[str, str], root: bool = False) -> Any:
+    if not isinstance(node, dict):
+        return node
+
+    if not root and _is_extractable(node):
+        name = refs.get(_structure(node))
+
+        if name:
+            return {'$ref': '#/components/schemas/%s' % name}
+
+    result = {}
+
+    for key, value in node.items():
+        if key in ('items', 'additionalProperties', 'not'):
+            result[key] = _replace_schema(value, refs)
+        elif key == 'properties' and isinstance(value, dict):
+            result[key] = {k: _replace_schema(v, refs) for k, v in value.items()}
+        elif key in _SCHEMA_LISTS and isinstance(value, list):
+            result[key] = [_replace_schema(v, refs) for v in value]
+        else:
+            result[key] = value
+
+    return result
+
+
+def _replace_refs(value: Any, refs: Dict[str, str]) -> Any:
+    if isinstance(value, list):
+        return [_replace_refs(v, refs) for v in value]
+
+    if not isinstance(value, dict):
+        return value
+
+    result = {}
+
+    for key, child in value.items():
+        if key == 'schema':
+            result[key] = _replace_schema(child, refs)
+        elif key == 'schemas' and isinstance(child, dict):
+            result[key] = {k: _replace_schema(v, refs, root=True) for k, v in child.items()}
+        else:
+            result[key] = _replace_refs(child, refs)
+
+    return result
@@ -0,0 +1,127 @@
+import hashlib
+import os
+
+from typing import Any, Optional
+from sanic_openapi3.types import Definition
+
+_SOURCES = os.path.dirname(os.path.abspath(__file__))
+
+
+class SpecCache:
+    directory: str
+    limit: int
+
+    def __init__(self, directory: str, limit: int = 8):
+        self.directory = directory
+        self.limit = limit
+
+    def load(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def store(self, key: str, body: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+
+        path = self._path(key)
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+
+        with open(tmp, 'wb') as fh:
+            fh.write(body)
+
+        os.replace(tmp, path)
+
+        self._prune()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, '%s.json' % key)
+
+    def _prune(self):
+        entries = [os.path.join(self.directory, x) for x in os.listdir(self.directory) if x.endswith('.json')]
+
+        if len(entries) <= self.limit:
+            return
+
+        entries.sort(key=os.path.getmtime)
+
+        for path in entries[:-self.limit]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def fingerprint(*values: Any) -> str:
+    digest = hashlib.sha1()
+
+    for name in sorted(os.listdir(_SOURCES)):
+        if name.endswith('.py'):
+            stat = os.stat(os.path.join(_SOURCES, name))
+            _update(digest, (name, stat.st_mtime_ns, stat.st_size), set())
+
+    for value in values:
+        _update(digest, value, set())
+
+    return digest.hexdigest()
+
+
+def _update(digest, value: Any, seen: set):
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        digest.update(('%s:%r;' % (type(value).__name__, value)).encode('utf-8'))
+        return
+
+    if hasattr(value, '__origin__'):
+        # Generic aliases are callable and pass for types, but the models they wrap live in their arguments.
+        digest.update(b'annotation:')
+        _update(digest, value.__origin__, seen)
+        _update(digest, getattr(value, '__args__', ()), seen)
+        _update(digest, getattr(value, '__metadata__', ()), seen)
+        return
+
+    if isinstance(value, type):
+        digest.update(('type:%s.%s;' % (value.__module__, value.__qualname__)).encode('utf-8'))
+
+        if value.__module__ == 'builtins' or value in seen:
+            return
+
+        seen.add(value)
+
+        _update(digest, value.__dict__.get('__annotations__', {}), seen)
+        _update(digest, {k: v for k, v in value.__dict__.items() if not k.startswith('_')}, seen)
+        return
+
+    if callable(value) and hasattr(value, '__qualname__'):
+        digest.update(('callable:%s.%s;' % (value.__module__, value.__qualname__)).encode('utf-8'))
+        return
+
+    if id(value) in seen:
+        digest.update(b'<seen>;')
+        return
+
+    seen.add(id(value))
+
+    if isinstance(value, Definition):
+        digest.update(('definition:%s;' % type(value).__name__).encode('utf-8'))
+        _update(digest, value._Definition__fields, seen)
+    elif isinstance(value, dict):
+        digest.update(b'{')
+
+        for k, v in value.items():
+            _update(digest, k, seen)
+            _update(digest, v, seen)
+
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        digest.update(b'[')
+
+        for item in (sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value):
+            _update(digest, item, seen)
+
+        digest.update(b']')
+    elif hasattr(value, '__dict__'):
+        digest.update(('object:%s;' % type(value).__qualname__).encode('utf-8'))
+        _update(digest, vars(value), seen)
+    else:
+        digest.update(('%s:%r;' % (type(value).__qualname__, value)).encode('utf-8'))
@@ -1,4 +1,3 @@
-from sanic_openapi3.types import Schema
 from sanic_openapi3.definitions import Header, Example, Parameter, Response, RequestBody, SecurityScheme
 from sanic_openapi3.main import components
 
@@ -42,7 +41,7 @@ def body(_name: str = None, **kwargs):
 
 def scheme(_name: str = None):
     def inner(cls):
-        components.schema(_name or cls.__name__, Schema.make(cls))
+        components.schema(_name or cls.__name__, cls)
         return cls
     return inner
 
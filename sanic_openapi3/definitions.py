@@ -1,22 +1,18 @@
 from typing import List, Dict, Any
-from sanic_openapi3.types import Definition, Schema
-
-
-class Reference(Schema):
-    def __init__(self, value):
-        super().__init__(**{'$ref': value})
-
-    def guard(self, fields: Dict[str, Any]):
-        return fields
+from sanic_openapi3.types import Definition, Schema, Reference  # noqa: F401
 
 
 class Contact(Definition):
+    __slots__ = ()
+
     name: str
     url: str
     email: str
 
 
 class License(Definition):
+    __slots__ = ()
+
     name: str
     url: str
 
@@ -25,6 +21,8 @@ class License(Definition):
 
 
 class Info(Definition):
+    __slots__ = ()
+
     title: str
     description: str
     termsOfService: str
@@ -37,6 +35,8 @@ class Info(Definition):
 
 
 class Example(Definition):
+    __slots__ = ()
+
     summary: str
     description: str
     value: Any
@@ -55,6 +55,8 @@ class Example(Definition):
 
 
 class MediaType(Definition):
+    __slots__ = ()
+
     schema: Schema
     example: Any
 
@@ -73,6 +75,8 @@ class MediaType(Definition):
 
 
 class Response(Definition):
+    __slots__ = ()
+
     content: Dict[str, MediaType]
     description: str
 
@@ -88,6 +92,8 @@ class Response(Definition):
 
 
 class RequestBody(Definition):
+    __slots__ = ()
+
     description: str
     required: bool
     content: Dict[str, MediaType]
@@ -101,6 +107,8 @@ class RequestBody(Definition):
 
 
 class ExternalDocumentation(Definition):
+    __slots__ = ()
+
     url: str
     description: str
 
@@ -113,6 +121,8 @@ class ExternalDocumentation(Definition):
 
 
 class Header(Definition):
+    __slots__ = ()
+
     name: str
     description: str
     externalDocs: ExternalDocumentation
@@ -126,6 +136,8 @@ class Header(Definition):
 
 
 class Parameter(Definition):
+    __slots__ = ()
+
     name: str
     location: str
     description: str
@@ -139,7 +151,7 @@ class Parameter(Definition):
 
     @property
     def fields(self):
-        values = super().fields
+        values = dict(super().fields)
 
         values['in'] = values.pop('location')
 
@@ -154,6 +166,8 @@ class Parameter(Definition):
 
 
 class Operation(Definition):
+    __slots__ = ()
+
     tags: List[str]
     summary: str
     description: str
@@ -168,6 +182,8 @@ class Operation(Definition):
 
 
 class PathItem(Definition):
+    __slots__ = ()
+
     summary: str
     description: str
     get: Operation
@@ -181,6 +197,8 @@ class PathItem(Definition):
 
 
 class SecurityScheme(Definition):
+    __slots__ = ()
+
     type: str
     description: str
     scheme: str
@@ -194,7 +212,7 @@ class SecurityScheme(Definition):
 
     @property
     def fields(self):
-        values = super().fields
+        values = dict(super().fields)
 
         values['in'] = values.pop('location')
 
@@ -217,6 +235,8 @@ class ServerVariable:
 
 
 class Server(Definition):
+    __slots__ = ()
+
     url: str
     description: str
     variables: Dict[str, ServerVariable]
@@ -226,6 +246,8 @@ class Server(Definition):
 
 
 class Tag(Definition):
+    __slots__ = ()
+
     name: str
     description: str
     externalDocs: ExternalDocumentation
@@ -235,6 +257,8 @@ class Tag(Definition):
 
 
 class Components(Definition):
+    __slots__ = ()
+
     schemas: Dict[str, Schema]
     responses: Dict[str, Response]
     parameters: Dict[str, Parameter]
@@ -247,6 +271,8 @@ class Components(Definition):
 
 
 class OpenAPI(Definition):
+    __slots__ = ()
+
     openapi: str
     info: Info
     servers: List[Server]
@@ -0,0 +1,188 @@
+import asyncio
+import gzip
+import hashlib
+
+from typing import Any, Callable, Dict, Iterable, Optional
+from sanic.response import HTTPResponse, StreamingHTTPResponse
+from sanic_openapi3.encoders import get_encoder
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class Document:
+    body: bytes
+    etag: str
+    content_type: str
+    cache_control: str
+    variants: Dict[str, bytes]
+    etags: Dict[str, str]
+
+    def __init__(self, body: bytes, content_type: str = 'application/json', cache_control: str = 'no-cache',
+                 compress: bool = True):
+        self.body = body
+        self.etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.variants = {'identity': body}
+        self.etags = {'identity': self.etag}
+
+        if compress:
+            self._compress()
+
+    @staticmethod
+    def make(spec: dict, encoder: Callable[[Any], bytes] = None, **kwargs):
+        return Document(encode(spec, encoder), **kwargs)
+
+    def negotiate(self, request) -> str:
+        header = request.headers.get('Accept-Encoding')
+
+        if not header or len(self.variants) == 1:
+            return 'identity'
+
+        accepted = {}
+
+        for item in header.split(','):
+            coding, _, params = item.strip().partition(';')
+            quality = 1.0
+
+            if params.strip().startswith('q='):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+
+            accepted[coding.strip().lower()] = quality
+
+        identity = accepted.get('identity', accepted.get('*', 1.0))
+
+        for coding in ('br', 'gzip'):
+            quality = accepted.get(coding, accepted.get('*', 0.0))
+
+            if coding in self.variants and quality > 0 and quality >= identity:
+                return coding
+
+        return 'identity'
+
+    def matches(self, request, etag: str) -> bool:
+        return _matches(request, etag)
+
+    def respond(self, request):
+        coding = self.negotiate(request)
+        headers = {'ETag': self.etags[coding], 'Cache-Control': self.cache_control, 'Vary': 'Accept-Encoding'}
+
+        if self.matches(request, headers['ETag']):
+            return HTTPResponse(status=304, headers=headers)
+
+        if coding != 'identity':
+            headers['Content-Encoding'] = coding
+
+        return HTTPResponse(self.variants[coding], headers=headers, content_type=self.content_type)
+
+    def _compress(self):
+        variants = {'gzip': gzip.compress(self.body, 9, mtime=0)}
+
+        if brotli is not None:
+            variants['br'] = brotli.compress(self.body, quality=11)
+
+        for coding, body in variants.items():
+            if len(body) >= len(self.body):
+                continue
+
+            self.variants[coding] = body
+            self.etags[coding] = '"%s-%s"' % (self.etag.strip('"'), coding)
+
+
+class LazyDocument:
+    _factory: Callable[[], Document]
+    _document: Optional[Document]
+    _lock: Optional[asyncio.Lock]
+
+    def __init__(self, factory: Callable[[], Document]):
+        self._factory = factory
+        self._document = None
+        self._lock = None
+
+    async def get(self) -> Document:
+        if self._document is not None:
+            return self._document
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._document is None:
+                # The build is CPU bound; running it in the executor keeps the event loop serving other requests.
+                self._document = await asyncio.get_running_loop().run_in_executor(None, self._factory)
+
+        return self._document
+
+
+class PendingDocument:
+    retry_after: int
+
+    def __init__(self, retry_after: int = 1):
+        self.retry_after = retry_after
+
+    def respond(self, request):
+        return HTTPResponse(status=503, headers={'Retry-After': str(self.retry_after), 'Cache-Control': 'no-store'})
+
+
+class FailedDocument:
+    def respond(self, request):
+        return HTTPResponse(status=500, headers={'Cache-Control': 'no-store'})
+
+
+class StreamingDocument:
+    etag: str
+    content_type: str
+    cache_control: str
+    _source: Callable[[], Iterable[bytes]]
+
+    def __init__(self, source: Callable[[], Iterable[bytes]], content_type: str = 'application/json',
+                 cache_control: str = 'no-cache'):
+        digest = hashlib.sha1()
+
+        for chunk in source():
+            digest.update(chunk)
+
+        self.etag = '"%s"' % digest.hexdigest()
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self._source = source
+
+    def read(self) -> bytes:
+        return b''.join(self._source())
+
+    def respond(self, request):
+        headers = {'ETag': self.etag, 'Cache-Control': self.cache_control}
+
+        if _matches(request, self.etag):
+            return HTTPResponse(status=304, headers=headers)
+
+        async def streaming_fn(response):
+            for chunk in self._source():
+                await response.write(chunk)
+
+        return StreamingHTTPResponse(streaming_fn, headers=headers, content_type=self.content_type)
+
+
+def _matches(request, etag: str) -> bool:
+    header = request.headers.get('If-None-Match')
+
+    if not header:
+        return False
+
+    for tag in header.split(','):
+        tag = tag.strip()
+
+        if tag == '*' or (tag[2:] if tag.startswith('W/') else tag) == etag:
+            return True
+
+    return False
+
+
+def encode(spec: dict, encoder: Callable[[Any], bytes] = None) -> bytes:
+    return (encoder or get_encoder())(spec)
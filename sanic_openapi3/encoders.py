@@ -0,0 +1,73 @@
+import json
+
+from datetime import date, time, datetime
+from typing import Any, Callable, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (date, time, datetime)):
+        return value.isoformat()
+
+    raise TypeError('Object of type %s is not JSON serializable' % type(value).__name__)
+
+
+def _stdlib(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def _orjson(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _ujson(value: Any) -> bytes:
+    return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False, default=_default).encode('utf-8')
+
+
+ENCODERS = {'json': _stdlib}
+
+if orjson is not None:
+    ENCODERS['orjson'] = _orjson
+
+if ujson is not None:
+    ENCODERS['ujson'] = _ujson
+
+
+def get_encoder(name: Union[str, Callable[[Any], bytes]] = None) -> Callable[[Any], bytes]:
+    if callable(name):
+        return name
+
+    if not name or name == 'auto':
+        return ENCODERS.get('orjson') or ENCODERS.get('ujson') or _stdlib
+
+    if name not in ENCODERS:
+        raise ValueError('JSON encoder %r is not available, choose from: %s' % (name, ', '.join(sorted(ENCODERS))))
+
+    return ENCODERS[name]
+
+
+if yaml is not None:
+    class _YamlDumper(getattr(yaml, 'CSafeDumper', yaml.SafeDumper)):
+        def ignore_aliases(self, data):
+            return True
+
+
+def encode_yaml(value: Any) -> bytes:
+    if yaml is None:
+        raise RuntimeError('PyYAML is required to render the specification as YAML')
+
+    return yaml.dump(value, Dumper=_YamlDumper, sort_keys=False, allow_unicode=True, encoding='utf-8')
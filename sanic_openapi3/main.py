@@ -1,23 +1,305 @@
-import re
+import logging
+import os
 
+from functools import partial
 from itertools import repeat
+from json import loads
+from typing import Dict, Optional, Tuple, Union
+from weakref import WeakKeyDictionary, ref
 from sanic.blueprints import Blueprint
+from sanic.exceptions import NotFound
 from sanic.response import json
 from sanic.views import CompositionView
 
-from sanic_openapi3.builders import ComponentsBuilder, OperationsBuilder, SpecificationBuilder
+from sanic_openapi3.builders import ComponentsBuilder, OperationBuilder, OperationsBuilder, Registry
+from sanic_openapi3.cache import SpecCache, fingerprint
+from sanic_openapi3.documents import Document, FailedDocument, LazyDocument, PendingDocument, StreamingDocument, \
+    encode
+from sanic_openapi3.encoders import get_encoder, encode_yaml
+from sanic_openapi3.paths import parse
+from sanic_openapi3.slices import SpecIndex
+from sanic_openapi3.stats import BuildStats
+from sanic_openapi3.streaming import iterencode
+from sanic_openapi3.types import counters, detach
 
+logger = logging.getLogger('sanic_openapi3')
 blueprint = Blueprint('openapi3')
 components = ComponentsBuilder()
 operations = OperationsBuilder()
-specification = SpecificationBuilder(components)
+registries = WeakKeyDictionary()
 
 
 @blueprint.listener('before_server_start')
 def build_spec(app, loop):
-    # --------------------------------------------------------------- #
-    # Globals
-    # --------------------------------------------------------------- #
+    if getattr(app.config, 'OPENAPI_BACKGROUND', False):
+        return serve(app, PendingDocument(getattr(app.config, 'OPENAPI_RETRY_AFTER', 1)))
+
+    serve(app, *prepare(app))
+
+
+@blueprint.listener('after_server_start')
+def build_spec_background(app, loop):
+    if isinstance(registry(app).document, PendingDocument):
+        loop.create_task(background(app, loop))
+
+
+async def background(app, loop):
+    try:
+        _document, stats = await loop.run_in_executor(None, prepare, app)
+    except Exception:
+        logger.exception('OpenAPI specification build failed')
+        # Retrying would most likely fail the same way, and clients must not keep waiting for it.
+        serve(app, FailedDocument())
+    else:
+        serve(app, _document, stats)
+
+
+def prepare(app) -> Tuple[Union[Document, LazyDocument, StreamingDocument], BuildStats]:
+    stats = BuildStats()
+    path = getattr(app.config, 'OPENAPI_SPEC_FILE', None)
+
+    if path and os.path.isfile(path):
+        with stats.phase('load'):
+            with open(path, 'rb') as fh:
+                body = fh.read()
+
+        return document(app, body, stats), stats
+
+    with stats.phase('cache'):
+        cache, key = cached(app)
+        body = cache.load(key) if cache else None
+
+    if body is not None:
+        return document(app, body, stats), stats
+
+    collect(app, stats)
+
+    if getattr(app.config, 'OPENAPI_STREAM', False):
+        before = dict(counters)
+        openapi = registry(app).specification.build(stats)
+        encoder = json_encoder(app)
+
+        with stats.phase('encoding'):
+            streamed = StreamingDocument(
+                lambda: iterencode(openapi, encoder=encoder),
+                cache_control=getattr(app.config, 'OPENAPI_CACHE_CONTROL', 'no-cache')
+            )
+
+        report(app, stats, before)
+
+        return streamed, stats
+
+    def make(_app=ref(app)):
+        _app = _app()
+        before = dict(counters)
+        spec = render(_app, stats, copy=False)
+
+        with stats.phase('encoding'):
+            _body = encode(spec, json_encoder(_app))
+
+        release(_app)
+
+        if cache:
+            cache.store(key, _body)
+
+        return document(_app, _body, stats, before)
+
+    if getattr(app.config, 'OPENAPI_LAZY', False):
+        # The lazy document is stored on the app's registry in a weak mapping, so it must not keep the app alive.
+        return LazyDocument(make), stats
+
+    return make(), stats
+
+
+def document_options(app) -> Dict:
+    return {
+        'cache_control': getattr(app.config, 'OPENAPI_CACHE_CONTROL', 'no-cache'),
+        'compress': getattr(app.config, 'OPENAPI_COMPRESS', True),
+    }
+
+
+def make_document(app, body: bytes, content_type: str = 'application/json') -> Document:
+    return Document(body, content_type=content_type, **document_options(app))
+
+
+def document(app, body: bytes, stats: BuildStats = None, before: Dict[str, int] = None) -> Document:
+    stats = stats or BuildStats()
+
+    with stats.phase('compression'):
+        _document = make_document(app, body)
+
+    stats.count('bytes', {k: len(v) for k, v in _document.variants.items()})
+    report(app, stats, before)
+
+    return _document
+
+
+def json_encoder(app):
+    return get_encoder(getattr(app.config, 'OPENAPI_JSON_ENCODER', None))
+
+
+def report(app, stats: BuildStats, before: Dict[str, int] = None):
+    # The schema counters are process-wide, so only the difference to the snapshot belongs to this build.
+    before = before if before is not None else counters
+    stats.counters.update({'schemas_%s' % k: v - before.get(k, 0) for k, v in counters.items()})
+
+    logger.debug('OpenAPI specification built in %.3fs: %s', sum(stats.phases.values()), stats.phases)
+
+    callback = getattr(app.config, 'OPENAPI_STATS_CALLBACK', None)
+
+    if callback:
+        callback(stats.serialize())
+
+
+def cached(app) -> Tuple[Optional[SpecCache], Optional[str]]:
+    directory = getattr(app.config, 'OPENAPI_CACHE_DIR', None)
+
+    if not directory:
+        return None, None
+
+    return SpecCache(directory), fingerprint(
+        {k: v for k, v in app.config.items() if k.startswith('OPENAPI_')},
+        [(x.name, [r.handler for r in getattr(x, 'routes', [])]) for x in app.blueprints.values()],
+        [(uri, r.methods, r.parameters, r.name, m, h, operations[h]) for uri, r, m, h in handlers(app)],
+        registry(app).components,
+    )
+
+
+def export(app, path: str, stream: bool = False, format: str = None):
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    format = format or ('yaml' if path.endswith(('.yaml', '.yml')) else 'json')
+
+    if format == 'yaml' and stream:
+        raise ValueError('YAML specifications can not be streamed')
+
+    collect(app)
+
+    try:
+        with open(tmp, 'wb') as fh:
+            if format == 'yaml':
+                fh.write(encode_yaml(loads(encode(render(app, copy=False), json_encoder(app)))))
+            elif stream:
+                for chunk in iterencode(registry(app).specification.build(), encoder=json_encoder(app)):
+                    fh.write(chunk)
+            else:
+                fh.write(encode(render(app, copy=False), json_encoder(app)))
+
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def serve(app, document: Union[Document, LazyDocument, PendingDocument, FailedDocument, StreamingDocument],
+          stats: BuildStats = None):
+    _registry = registry(app)
+    registered = _registry.document is not None
+    _registry.serve(document, stats)
+
+    yaml_uri = getattr(app.config, 'OPENAPI_YAML_URL', None)
+
+    if yaml_uri and isinstance(document, (Document, StreamingDocument)):
+        with _registry.stats.phase('yaml'):
+            yaml_document(app, document)
+
+    if registered:
+        return
+
+    uri = getattr(app.config, 'OPENAPI_URL', 'openapi.json')
+
+    async def spec_json(request):
+        _document = registry(request.app).document
+
+        if isinstance(_document, LazyDocument):
+            _document = await _document.get()
+
+        if request.query_string and not isinstance(_document, (PendingDocument, FailedDocument)):
+            tag, path = request.args.get('tag'), request.args.get('path')
+
+            if tag or path:
+                _document = slices(request.app, _document).slice(tag, path)
+
+                if _document is None:
+                    raise NotFound('No operations match the requested slice')
+
+        return _document.respond(request)
+
+    async def spec_yaml(request):
+        _document = registry(request.app).document
+
+        if isinstance(_document, LazyDocument):
+            _document = await _document.get()
+
+        if isinstance(_document, (PendingDocument, FailedDocument)):
+            return _document.respond(request)
+
+        return yaml_document(request.app, _document).respond(request)
+
+    def spec_stats(request):
+        return json(registry(request.app).stats.serialize())
+
+    app.add_route(spec_json, uri=uri, strict_slashes=True)
+
+    if yaml_uri:
+        app.add_route(spec_yaml, uri=yaml_uri, strict_slashes=True)
+
+    if getattr(app.config, 'OPENAPI_STATS', False):
+        app.add_route(spec_stats, uri=uri.rstrip('/') + '/_stats', strict_slashes=True)
+
+
+def slices(app, document: Union[Document, StreamingDocument]) -> SpecIndex:
+    _registry = registry(app)
+
+    if _registry.index is None:
+        body = document.body if isinstance(document, Document) else document.read()
+        factory = partial(Document, **document_options(app))
+        _registry.index = SpecIndex(partial(loads, body), factory, json_encoder(app))
+
+    return _registry.index
+
+
+def yaml_document(app, document: Union[Document, StreamingDocument]) -> Document:
+    _registry = registry(app)
+
+    if _registry.yaml is None:
+        body = document.body if isinstance(document, Document) else document.read()
+        _registry.yaml = make_document(app, encode_yaml(loads(body)), 'application/yaml')
+
+    return _registry.yaml
+
+
+def build(app) -> dict:
+    collect(app)
+
+    return render(app)
+
+
+def collect(app, stats: BuildStats = None):
+    stats = stats or BuildStats()
+
+    with stats.phase('globals'):
+        describe(app)
+
+    with stats.phase('tagging'):
+        tag(app)
+
+    with stats.phase('routes'):
+        walk(app)
+
+    registry(app).collected = True
+
+
+def registry(app) -> Registry:
+    _registry = registries.get(app)
+
+    if _registry is None:
+        _registry = registries[app] = Registry(components)
+
+    return _registry
+
+
+def describe(app):
+    specification = registry(app).specification
     specification.describe(
         getattr(app.config, 'OPENAPI_TITLE', 'API'),
         getattr(app.config, 'OPENAPI_VERSION', '1.0.0'),
@@ -36,59 +318,136 @@ def build_spec(app, loop):
         getattr(app.config, 'OPENAPI_CONTACT_EMAIL', None)
     )
 
-    # --------------------------------------------------------------- #
-    # Blueprints
-    # --------------------------------------------------------------- #
-    for _blueprint in app.blueprints.values():
-        if not hasattr(_blueprint, 'routes'):
-            continue
 
-        for _route in _blueprint.routes:
-            if _route.handler not in operations:
-                continue
+def tag(app):
+    tags = registry(app).tags
+    tags.clear()
 
-            operation = operations.get(_route.handler)
+    for _blueprint in app.blueprints.values():
+        for _route in getattr(_blueprint, 'routes', []):
+            tags.setdefault(_route.handler, _blueprint.name)
 
-            if not operation.tags:
-                operation.tag(_blueprint.name)
 
-    # --------------------------------------------------------------- #
-    # Operations
-    # --------------------------------------------------------------- #
-    for _uri, _route in app.router.routes_all.items():
+def handlers(app, uris=None):
+    for _uri in uris or list(app.router.routes_all):
         if '<file_uri' in _uri:
             continue
 
-        handler_type = type(_route.handler)
+        _route = app.router.routes_all[_uri]
 
-        if handler_type is CompositionView:
-            view = _route.handler
-            method_handlers = view.handlers.items()
+        if type(_route.handler) is CompositionView:
+            method_handlers = _route.handler.handlers.items()
         else:
             method_handlers = zip(_route.methods, repeat(_route.handler))
 
-        uri = _uri if _uri == "/" else _uri.rstrip('/')
+        for method, _handler in method_handlers:
+            if _handler in operations:
+                yield _uri, _route, method, _handler
+
 
-        for segment in _route.parameters:
-            uri = re.sub('<' + segment.name + '.*?>', '{' + segment.name + '}', uri)
+def endpoint(app, name: str, method: str) -> Optional[OperationBuilder]:
+    _registry = registry(app)
+    operation = _registry.endpoints.get((name, method))
 
-        for method, _handler in method_handlers:
-            if _handler not in operations:
-                continue
+    if operation is None and not _registry.indexed:
+        # Responses may be sent before the specification is built, or when it was loaded from a file or cache.
+        _registry.indexed = True
+
+        for _uri, _route, _method, _handler in handlers(app):
+            _registry.endpoints.setdefault((_route.endpoint, _method.upper()), operations[_handler])
+
+        operation = _registry.endpoints.get((name, method))
+
+    return operation
+
+
+def walk(app):
+    registry(app).specification.reset()
+
+    for _uri, _route, method, _handler in handlers(app):
+        walk_route(app, _uri, _route, method, _handler)
+
+
+def walk_route(app, _uri: str, _route, method: str, handler):
+    _registry = registry(app)
+    uri, parameters = parse(_uri)
+    operation = operations[handler].copy()
+
+    if not operation.tags and handler in _registry.tags:
+        operation.tag(_registry.tags[handler])
+
+    if not hasattr(operation, 'operationId'):
+        operation.operationId = '%s_%s' % (method.lower(), _route.name)
+
+    for name, schema in parameters:
+        operation.parameter(name, schema, 'path')
+
+    _registry.specification.operation(uri, method, operation)
+    _registry.endpoints[(_route.endpoint, method.upper())] = operation
+
+
+def add_operation(app, uri: str):
+    if registry(app).collected:
+        tag(app)
+
+        for _uri, _route, method, _handler in handlers(app, [uri]):
+            walk_route(app, _uri, _route, method, _handler)
+    else:
+        # A specification loaded from a file or the cache was never collected, so the update needs the whole tree.
+        collect(app)
+
+    refresh(app)
+
+
+def remove_operation(app, uri: str, method: str = None):
+    if not registry(app).collected:
+        collect(app)
+
+    registry(app).specification.remove(parse(uri)[0], method)
+    refresh(app)
+
+
+def refresh(app):
+    stats = BuildStats()
+    before = dict(counters)
+    spec = render(app, stats, copy=False)
+
+    with stats.phase('encoding'):
+        body = encode(spec, json_encoder(app))
+
+    release(app)
+    serve(app, document(app, body, stats, before), stats)
+
+
+def release(app):
+    # Once encoded, the builder tree is only needed to rebuild single paths on runtime updates.
+    if not getattr(app.config, 'OPENAPI_RUNTIME_UPDATES', False):
+        registry(app).release()
+
+
+def render(app, stats: BuildStats = None, copy: bool = True) -> dict:
+    # The rendered paths share the dicts cached on definitions and fragments, so only internal callers
+    # that encode right away may skip the copy.
+    stats = stats or BuildStats()
+    spec = registry(app).specification.serialize(stats, int(getattr(app.config, 'OPENAPI_WORKERS', 0)))
+    threshold = getattr(app.config, 'OPENAPI_AUTO_COMPONENTS', False)
 
-            operation = operations[_handler]
+    if threshold:
+        with stats.phase('extraction'):
+            spec = registry(app).components.extract(spec, int(threshold))
 
-            if not hasattr(operation, 'operationId'):
-                operation.operationId = '%s_%s' % (method.lower(), _route.name)
+    with stats.phase('validators'):
+        validators(app)
 
-            for _parameter in _route.parameters:
-                operation.parameter(_parameter.name, _parameter.cast, 'path')
+    return detach(spec) if copy else spec
 
-            specification.operation(uri, method, operation)
 
-    openapi = specification.build().serialize()
+def validators(app):
+    _components = registry(app).components
 
-    def spec_json(request):
-        return json(openapi)
+    for _uri, _route, method, _handler in handlers(app):
+        operation = operations[_handler]
 
-    app.add_route(spec_json, uri=getattr(app.config, 'OPENAPI_URL', 'openapi.json'), strict_slashes=True)
+        if operation.validated and operation.validator is None:
+            operation.resolve(_components)
+            operation.compile(_components.serialized_schemas())
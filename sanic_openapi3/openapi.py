@@ -1,5 +1,8 @@
+from functools import wraps
+from inspect import isawaitable
 from typing import Any
-from sanic_openapi3.main import operations, components
+from sanic.response import HTTPResponse
+from sanic_openapi3.main import operations, endpoint, json_encoder, registry
 
 
 def operation(name: str):
@@ -46,21 +49,21 @@ def deprecated():
 
 def body(content: Any, **kwargs):
     def inner(func):
-        operations[func].body(components.maybe_ref(content), **kwargs)
+        operations[func].body(content, **kwargs)
         return func
     return inner
 
 
 def parameter(name: str, schema: Any, location: str = 'query', **kwargs):
     def inner(func):
-        operations[func].parameter(name, components.maybe_ref(schema), location, **kwargs)
+        operations[func].parameter(name, schema, location, **kwargs)
         return func
     return inner
 
 
 def response(status, content: Any = None, description: str = None, **kwargs):
     def inner(func):
-        operations[func].response(status, components.maybe_ref(content), description, **kwargs)
+        operations[func].response(status, content, description, **kwargs)
         return func
     return inner
 
@@ -70,3 +73,44 @@ def secured(*args, **kwargs):
         operations[func].secured(*args, **kwargs)
         return func
     return inner
+
+
+def validate():
+    def inner(func):
+        operation = operations[func]
+        operation.validate()
+
+        @wraps(func)
+        async def handler(request, *args, **kwargs):
+            validator = operation.validator
+
+            if validator is None:
+                components = registry(request.app).components
+                operation.resolve(components)
+                validator = operation.compile(components.serialized_schemas())
+
+            validator(request)
+
+            response = func(request, *args, **kwargs)
+
+            if isawaitable(response):
+                response = await response
+
+            return response
+
+        operations[handler] = operation
+        return handler
+    return inner
+
+
+def respond(request, status: int, body: Any, headers: dict = None):
+    operation = endpoint(request.app, request.endpoint, request.method)
+    components = registry(request.app).components
+    dumps = json_encoder(request.app)
+
+    if operation:
+        operation.resolve(components)
+
+    encoder = operation and operation.encoder(status, components.serialized_schemas, dumps) or dumps
+
+    return HTTPResponse(encoder(body), status=status, headers=headers, content_type='application/json')
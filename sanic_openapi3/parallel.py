@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import multiprocessing
+import pickle
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Tuple
+from sanic_openapi3.types import counters, recursive_schemas
+
+logger = logging.getLogger('sanic_openapi3')
+
+_builder = None
+
+
+def _init(builder):
+    global _builder
+    _builder = builder
+
+
+def _build(paths: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict], Dict[str, int]]:
+    # Operations are resolved here, so the schema derivation runs in the worker as well.
+    before = dict(counters)
+    fragments = {path: _builder._build_path(_builder._paths[path]).serialize() for path in paths}
+    recursive = {k: v.serialize() for k, v in recursive_schemas().items()}
+
+    return fragments, recursive, {k: v - before.get(k, 0) for k, v in counters.items()}
+
+
+def chunks(paths: List[str], count: int) -> List[List[str]]:
+    groups = {}
+
+    for path in paths:
+        groups.setdefault(path.lstrip('/').split('/', 1)[0], []).append(path)
+
+    result = [[] for _ in range(count)]
+
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(result, key=len).extend(group)
+
+    return [x for x in result if x]
+
+
+def forkable() -> bool:
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return False
+
+    # Forking copies only the calling thread; locks held by other threads, such as the resolver lock or
+    # an executor's queue, or by a running event loop would be left in an unusable state in the children.
+    if threading.current_thread() is not threading.main_thread() or threading.active_count() > 1:
+        return False
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return True
+
+    return False
+
+
+def build_fragments(builder, paths: List[str], workers: int) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    # Workers are forked so they inherit the builder instead of receiving it pickled; only path
+    # names go in and serialized fragments come back.
+    if not forkable():
+        logger.debug('OpenAPI specification can not be built in forked workers here, building serially')
+
+        return {}, {}
+
+    fragments, recursive, counts = {}, {}, {}
+    context = multiprocessing.get_context('fork')
+
+    try:
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init, initargs=(builder,)) as executor:
+            for _fragments, _recursive, _counters in executor.map(_build, chunks(paths, workers * 4)):
+                fragments.update(_fragments)
+                recursive.update(_recursive)
+
+                for key, value in _counters.items():
+                    counts[key] = counts.get(key, 0) + value
+    except (pickle.PicklingError, TypeError, AttributeError, BrokenProcessPool) as e:
+        logger.warning('Parallel OpenAPI build failed, building serially: %s', e)
+
+        return {}, {}
+
+    for key, value in counts.items():
+        counters[key] += value
+
+    return fragments, recursive
@@ -0,0 +1,46 @@
+import re
+
+from functools import lru_cache
+from typing import Tuple
+from sanic_openapi3.types import Schema, Integer, Float, String
+
+_TOKEN = re.compile(r'<([^<>:]+)(?::([^<>]*))?>')
+
+_TYPES = {
+    'int': Integer,
+    'number': Float,
+    'string': String,
+    'path': String,
+    'alpha': lambda: String(pattern='^[A-Za-z]+$'),
+    'uuid': lambda: String(format='uuid'),
+}
+
+
+@lru_cache(maxsize=None)
+def parse(uri: str) -> Tuple[str, Tuple[Tuple[str, Schema], ...]]:
+    parameters = []
+
+    def replace(match) -> str:
+        name, _type = match.group(1).strip(), (match.group(2) or 'string').strip()
+        parameters.append((name, _schema(_type)))
+
+        return '{%s}' % name
+
+    path = _TOKEN.sub(replace, uri if uri == '/' else uri.rstrip('/'))
+
+    return path, tuple(parameters)
+
+
+def convert(uri: str) -> str:
+    return parse(uri)[0]
+
+
+def parameters(uri: str) -> Tuple[Tuple[str, Schema], ...]:
+    return parse(uri)[1]
+
+
+def _schema(_type: str) -> Schema:
+    if _type in _TYPES:
+        return _TYPES[_type]()
+
+    return String(pattern='^%s$' % _type)
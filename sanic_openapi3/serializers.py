@@ -0,0 +1,142 @@
+from json.encoder import encode_basestring
+from math import isfinite
+from typing import Any, Callable, Dict, List
+from sanic_openapi3.encoders import get_encoder
+
+_missing = object()
+
+
+def _float(value: float) -> str:
+    if not isfinite(value):
+        raise ValueError('Out of range float values are not JSON compliant: %r' % value)
+
+    return float.__repr__(value)
+
+
+def _getter(value: Any) -> Callable:
+    if isinstance(value, dict):
+        return value.get
+
+    return lambda key, default: getattr(value, key, default)
+
+
+class Compiler:
+    _schemas: Dict[str, Dict]
+    _namespace: Dict[str, Any]
+    _functions: Dict[str, str]
+    _sources: List[str]
+    _counter: int
+
+    def __init__(self, schemas: Dict[str, Dict] = None, encoder: Callable[[Any], bytes] = None):
+        dumps = encoder or get_encoder()
+
+        self._schemas = schemas or {}
+        self._namespace = {
+            '_missing': _missing,
+            '_fallback': lambda value: dumps(value).decode('utf-8'),
+            '_float': _float,
+            '_string': encode_basestring,
+            '_getter': _getter,
+        }
+        self._functions = {}
+        self._sources = []
+        self._counter = 0
+
+    def schema(self, schema: Dict, name: str = 'encode') -> Callable:
+        function = self._function(schema)
+        lines = [
+            'def %s(value):' % name,
+            '    return %s(value).encode("utf-8")' % function,
+        ]
+
+        source = '\n'.join(self._sources + lines) + '\n'
+        namespace = dict(self._namespace)
+
+        exec(compile(source, '<openapi-serializer %s>' % name, 'exec'), namespace)
+
+        function = namespace[name]
+        function.__source__ = source
+
+        return function
+
+    def _var(self, prefix: str = '_v') -> str:
+        self._counter += 1
+
+        return '%s%d' % (prefix, self._counter)
+
+    def _function(self, schema: Dict) -> str:
+        if '$ref' in schema:
+            return self._ref(schema['$ref'])
+
+        name = self._var('_e')
+        self._define(name, schema)
+
+        return name
+
+    def _ref(self, ref: str) -> str:
+        if ref in self._functions:
+            return self._functions[ref]
+
+        name = self._functions[ref] = self._var('_ref')
+        self._define(name, self._schemas.get(ref.rsplit('/', 1)[-1], {}))
+
+        return name
+
+    def _define(self, name: str, schema: Dict):
+        lines = ['def %s(value):' % name, '    if value is None:', "        return 'null'"]
+        lines.extend(self._body(schema))
+
+        self._sources.append('\n'.join(lines) + '\n')
+
+    def _body(self, schema: Dict) -> List[str]:
+        _type = schema.get('type')
+
+        if _type == 'integer':
+            return ['    if type(value) is int:', "        return '%d' % value", '    return _fallback(value)']
+
+        if _type == 'number':
+            return [
+                '    if type(value) is int:', "        return '%d' % value",
+                '    if type(value) is float:', '        return _float(value)',
+                '    return _fallback(value)',
+            ]
+
+        if _type == 'boolean':
+            return [
+                '    if value is True:', "        return 'true'",
+                '    if value is False:', "        return 'false'",
+                '    return _fallback(value)',
+            ]
+
+        if _type == 'string':
+            return ['    if type(value) is str:', '        return _string(value)', '    return _fallback(value)']
+
+        if _type == 'array' and isinstance(schema.get('items'), dict):
+            return [
+                '    if type(value) is list or type(value) is tuple:',
+                "        return '[' + ','.join(map(%s, value)) + ']'" % self._function(schema['items']),
+                '    return _fallback(value)',
+            ]
+
+        if _type == 'object' and schema.get('properties'):
+            lines = ['    get = _getter(value)', '    parts = []']
+
+            for key, prop in schema['properties'].items():
+                item = self._var()
+
+                lines.append('    %s = get(%r, _missing)' % (item, key))
+                lines.append('    if %s is not _missing:' % item)
+                lines.append('        parts.append(%r + %s(%s))' % (
+                    encode_basestring(key) + ':', self._function(prop), item
+                ))
+
+            lines.append("    return '{' + ','.join(parts) + '}'")
+
+            return lines
+
+        return ['    return _fallback(value)']
+
+
+def compile_encoder(schema: Dict, schemas: Dict[str, Dict] = None, name: str = 'encode',
+                    encoder: Callable[[Any], bytes] = None) -> Callable[[Any], bytes]:
+    return Compiler(schemas, encoder).schema(schema, name)
@@ -0,0 +1,131 @@
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from sanic_openapi3.documents import Document, encode
+
+_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace')
+
+
+class SpecIndex:
+    _source: Callable[[], Dict]
+    _factory: Callable[[bytes], Document]
+    _encoder: Callable[[Any], bytes]
+    _spec: Optional[Dict]
+    _tags: Dict[str, List[Tuple[str, str]]]
+    _documents: Dict[Tuple[str, str], Document]
+
+    def __init__(self, source: Callable[[], Dict], factory: Callable[[bytes], Document] = Document,
+                 encoder: Callable[[Any], bytes] = None):
+        self._source = source
+        self._factory = factory
+        self._encoder = encoder
+        self._spec = None
+        self._tags = {}
+        self._documents = {}
+
+    def slice(self, tag: str = None, path: str = None) -> Optional[Document]:
+        key = (tag, path)
+
+        if key in self._documents:
+            return self._documents[key]
+
+        spec = self._index()
+        operations = [(p, m) for p, m in self._tags.get(tag, [])] if tag else list(_operations(spec['paths']))
+
+        if path:
+            operations = [(p, m) for p, m in operations if p == path]
+
+        if not operations:
+            return None
+
+        document = self._documents[key] = self._factory(encode(_slice(spec, operations), self._encoder))
+
+        return document
+
+    def _index(self) -> Dict:
+        if self._spec is not None:
+            return self._spec
+
+        spec = self._source()
+
+        for path, method in _operations(spec.get('paths') or {}):
+            for tag in spec['paths'][path][method].get('tags') or []:
+                self._tags.setdefault(tag, []).append((path, method))
+
+        self._spec = spec
+
+        return spec
+
+
+def _operations(paths: Dict):
+    for path, item in paths.items():
+        for method in _METHODS:
+            if isinstance(item.get(method), dict):
+                yield path, method
+
+
+def _slice(spec: Dict, operations: List[Tuple[str, str]]) -> Dict:
+    paths = {}
+    tags = set()
+    schemes = set()
+
+    for path, method in operations:
+        item = spec['paths'][path]
+        operation = item[method]
+
+        if path not in paths:
+            paths[path] = {k: v for k, v in item.items() if k not in _METHODS}
+
+        paths[path][method] = operation
+        tags.update(operation.get('tags') or [])
+
+        for requirement in operation.get('security') or []:
+            schemes.update(requirement)
+
+    components = spec.get('components') or {}
+    refs = _refs(paths, components)
+    sliced = {}
+
+    for section, items in components.items():
+        if not isinstance(items, dict):
+            continue
+
+        if section == 'securitySchemes':
+            selected = {k: v for k, v in items.items() if k in schemes or (section, k) in refs}
+        else:
+            selected = {k: v for k, v in items.items() if (section, k) in refs}
+
+        sliced[section] = selected
+
+    result = dict(spec)
+    result['paths'] = paths
+    result['tags'] = [x for x in spec.get('tags') or [] if x.get('name') in tags]
+    result['components'] = sliced
+
+    return result
+
+
+def _refs(value: Any, components: Dict) -> Set[Tuple[str, str]]:
+    found = set()
+    pending = [value]
+
+    while pending:
+        node = pending.pop()
+
+        if isinstance(node, list):
+            pending.extend(node)
+            continue
+
+        if not isinstance(node, dict):
+            continue
+
+        ref = node.get('$ref')
+
+        if isinstance(ref, str) and ref.startswith('#/components/'):
+            section, _, name = ref[len('#/components/'):].partition('/')
+
+            if (section, name) not in found:
+                found.add((section, name))
+                pending.append((components.get(section) or {}).get(name))
+
+        pending.extend(node.values())
+
+    return found
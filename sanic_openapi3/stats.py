@@ -0,0 +1,32 @@
+import time
+
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+class BuildStats:
+    phases: Dict[str, float]
+    counters: Dict[str, Any]
+
+    def __init__(self):
+        self.phases = {}
+        self.counters = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, name: str, value: Any):
+        self.counters[name] = value
+
+    def serialize(self) -> Dict:
+        return {
+            'phases': dict(self.phases),
+            'total': sum(self.phases.values()),
+            'counters': dict(self.counters),
+        }
@@ -0,0 +1,72 @@
+import json
+
+from json.encoder import encode_basestring
+from typing import Any, Callable, Iterator
+from sanic_openapi3.encoders import _default
+from sanic_openapi3.types import Definition
+
+_scalar = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default).encode
+
+
+def iterencode(value: Any, chunk_size: int = 65536, encoder: Callable[[Any], bytes] = None) -> Iterator[bytes]:
+    scalar = (lambda x: encoder(x).decode('utf-8')) if encoder else _scalar
+    buffer = []
+    size = 0
+
+    for piece in _pieces(value, scalar):
+        buffer.append(piece)
+        size += len(piece)
+
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def _pieces(value: Any, scalar: Callable[[Any], str]) -> Iterator[str]:
+    if isinstance(value, Definition):
+        value = value.fields
+
+    if isinstance(value, dict):
+        if not value:
+            yield '{}'
+            return
+
+        separator = '{'
+
+        for key, item in value.items():
+            yield separator + _key(key) + ':'
+            yield from _pieces(item, scalar)
+            separator = ','
+
+        yield '}'
+    elif isinstance(value, (list, tuple)):
+        if not value:
+            yield '[]'
+            return
+
+        separator = '['
+
+        for item in value:
+            yield separator
+            yield from _pieces(item, scalar)
+            separator = ','
+
+        yield ']'
+    elif isinstance(value, str):
+        yield encode_basestring(value)
+    else:
+        yield scalar(value)
+
+
+def _key(key: Any) -> str:
+    if isinstance(key, str):
+        return encode_basestring(key)
+
+    if key is None or isinstance(key, (bool, int, float)):
+        return encode_basestring(_scalar(key))
+
+    raise TypeError('keys must be str, int, float, bool or None, not %s' % type(key).__name__)
@@ -1,30 +1,116 @@
-import json
+import collections.abc
+import dataclasses
+import re
+import sys
+import threading
 
 from datetime import date, time, datetime
-from typing import List, Dict, Any, get_type_hints
+from enum import Enum
+from typing import List, Dict, Any, ClassVar, FrozenSet, Iterator, Tuple, TypeVar, Union, get_type_hints
+from weakref import ref, WeakKeyDictionary, WeakSet, WeakValueDictionary
+from sanic_openapi3.encoders import get_encoder
+
+try:
+    import attr
+except ImportError:  # pragma: no cover
+    attr = None
+
+try:
+    from typing import Literal
+except ImportError:  # pragma: no cover
+    Literal = None
 
 
 class Definition:
+    __slots__ = ('__fields', '__serialized', '__parents', '__weakref__')
     __fields: dict
 
     def __init__(self, **kwargs):
         self.__fields = self.guard(kwargs)
+        self.__serialized = None
+        self.__parents = None
+
+        for child in _children(self.__fields):
+            child.adopt(self)
 
     @property
     def fields(self):
         return self.__fields
 
+    def update(self, **kwargs):
+        if self.__parents is False:
+            raise TypeError('Shared %s schema can not be modified' % self.__class__.__name__)
+
+        fields = self.guard(kwargs)
+        self.__fields.update(fields)
+
+        for child in _children(fields):
+            child.adopt(self)
+
+        self.invalidate()
+
+    def adopt(self, parent: 'Definition'):
+        parents = self.__parents
+
+        if parents is False:
+            return
+
+        if parents is None:
+            self.__parents = ref(parent)
+        elif isinstance(parents, ref):
+            alive = parents()
+
+            if alive is None:
+                self.__parents = ref(parent)
+            elif alive is not parent:
+                self.__parents = WeakSet((alive, parent))
+        else:
+            parents.add(parent)
+
+    def freeze(self):
+        self.__parents = False
+
+    def invalidate(self):
+        if self.__serialized is None:
+            return
+
+        self.__serialized = None
+        parents = self.__parents
+
+        if isinstance(parents, ref):
+            parents = [parents()]
+
+        for parent in parents or ():
+            if parent is not None:
+                parent.invalidate()
+
     def guard(self, fields):
-        return {k: v for k, v in fields.items() if k in _properties(self).keys() or k.startswith('x-')}
+        allowed = _allowed(self.__class__)
+
+        return {_intern(k): _intern(v) for k, v in fields.items() if k in allowed or k.startswith('x-')}
+
+    def release(self):
+        self.__serialized = None
 
     def serialize(self):
-        return _serialize(self.fields)
+        # release() may clear the cache from another thread, so the result is kept in a local.
+        serialized = self.__serialized
+
+        if serialized is None:
+            serialized = self.__serialized = _serialize(self.fields)
+
+        return serialized
 
     def __str__(self):
-        return json.dumps(self.serialize())
+        return get_encoder()(self.serialize()).decode('utf-8')
+
+
+counters = {'schemas': 0, 'models': 0, 'cached': 0}
 
 
 class Schema(Definition):
+    __slots__ = ()
+
     title: str
     description: str
     type: str
@@ -33,6 +119,7 @@ class Schema(Definition):
     required: False
     default: None
     example: None
+    enum: List[Any]
     oneOf: List[Definition]
     anyOf: List[Definition]
     allOf: List[Definition]
@@ -46,11 +133,22 @@ class Schema(Definition):
     minLength: int
     pattern: str
 
+    def __init__(self, **kwargs):
+        counters['schemas'] += 1
+
+        super().__init__(**kwargs)
+
     @staticmethod
     def make(value, **kwargs):
         if isinstance(value, Schema):
             return value
 
+        if not kwargs and isinstance(value, type) and value in _PRIMITIVES:
+            return _primitive(value)
+
+        if _is_annotation(value):
+            return _annotation(value, **kwargs)
+
         if value == bool:
             return Boolean(**kwargs)
         elif value == int:
@@ -101,77 +199,118 @@ class Schema(Definition):
             return Array(schema,  **kwargs)
         elif _type == dict:
             return Object({k: Schema.make(v) for k, v in value.items()}, **kwargs)
+        elif isinstance(value, type):
+            return _model(value, **kwargs)
         else:
             return Object({k: Schema.make(v) for k, v in _properties(value).items()}, **kwargs)
 
 
+class Reference(Schema):
+    __slots__ = ()
+
+    def __init__(self, value):
+        super().__init__(**{'$ref': value})
+
+    def guard(self, fields: Dict[str, Any]):
+        return {k: _intern(v) for k, v in fields.items()}
+
+
 class Boolean(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="boolean", **kwargs)
 
 
 class Integer(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="integer", format="int32", **kwargs)
 
 
 class Long(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="integer", format="int64", **kwargs)
 
 
 class Float(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="number", format="float", **kwargs)
 
 
 class Double(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="number", format="double", **kwargs)
 
 
 class String(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="string", **kwargs)
 
 
 class Byte(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="string", format="byte", **kwargs)
 
 
 class Binary(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="string", format="binary", **kwargs)
 
 
 class Date(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="string", format="date", **kwargs)
 
 
 class Time(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="string", format="time", **kwargs)
 
 
 class DateTime(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="string", format="date-time", **kwargs)
 
 
 class Password(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="string", format="password", **kwargs)
 
 
 class Email(Schema):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(type="string", format="email", **kwargs)
 
 
 class Object(Schema):
+    __slots__ = ()
+
     properties: Dict[str, Schema]
+    additionalProperties: Schema
     maxProperties: int
     minProperties: int
 
@@ -180,6 +319,8 @@ class Object(Schema):
 
 
 class Array(Schema):
+    __slots__ = ()
+
     items: Schema
     maxItems: int
     minItems: int
@@ -189,6 +330,46 @@ class Array(Schema):
         super().__init__(type="array", items=items, **kwargs)
 
 
+_PRIMITIVES = {
+    bool: Boolean,
+    int: Integer,
+    float: Float,
+    str: String,
+    bytes: Byte,
+    bytearray: Binary,
+    date: Date,
+    time: Time,
+    datetime: DateTime,
+}
+
+_primitives = {}  # type: Dict[type, Schema]
+
+
+def _primitive(value: type) -> Schema:
+    schema = _primitives.get(value)
+
+    if schema is None:
+        schema = _primitives[value] = _PRIMITIVES[value]()
+        schema.freeze()
+
+    return schema
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def _children(value: Any) -> Iterator[Definition]:
+    if isinstance(value, Definition):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _children(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _children(item)
+
+
 def _serialize(value) -> Any:
     if isinstance(value, Definition):
         return value.serialize()
@@ -202,7 +383,290 @@ def _serialize(value) -> Any:
     return value
 
 
+def detach(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: detach(v) for k, v in value.items()}
+
+    if isinstance(value, list):
+        return [detach(v) for v in value]
+
+    return value
+
+
+_models_cache = WeakKeyDictionary()  # type: Dict[type, Dict[tuple, Schema]]
+_recursive = WeakKeyDictionary()  # type: Dict[type, Schema]
+_names = WeakKeyDictionary()  # type: Dict[type, str]
+_owners = WeakValueDictionary()  # type: Dict[str, type]
+_local = threading.local()
+
+
+def _component_name(cls: type) -> str:
+    name = _names.get(cls)
+
+    if name is not None:
+        return name
+
+    name = cls.__name__
+
+    if _owners.get(name, cls) is not cls:
+        # Another class of the same name is already referenced, so qualify this one with its module.
+        name = base = re.sub(r'[^A-Za-z0-9._-]+', '_', '%s.%s' % (cls.__module__, cls.__qualname__))
+        count = 1
+
+        while _owners.get(name, cls) is not cls:
+            count += 1
+            name = '%s_%d' % (base, count)
+
+    _names[cls] = name
+    _owners[name] = cls
+
+    return name
+
+
+def _model(cls: type, **kwargs) -> Schema:
+    bare = not kwargs
+    key = _key(kwargs)
+    schema = _cached(_models_cache, cls, key)
+
+    if schema is not None:
+        counters['cached'] += 1
+
+        return schema
+
+    making = getattr(_local, 'making', None)
+
+    if making is None:
+        making = _local.making = {}
+
+    if cls in making:
+        making[cls] = True
+
+        return Reference('#/components/schemas/%s' % _component_name(cls))
+
+    making[cls] = False
+    counters['models'] += 1
+
+    try:
+        properties, required = _fields(cls)
+
+        if required and 'required' not in kwargs:
+            kwargs['required'] = required
+
+        schema = Object(properties, **kwargs)
+    finally:
+        recursive = making.pop(cls)
+
+    if recursive and cls not in _recursive:
+        # The component is referenced from every use of the class, so it must not carry per-use keywords.
+        _recursive[cls] = schema if bare else _model(cls)
+
+    _store(_models_cache, cls, key, schema)
+
+    return schema
+
+
+def _key(kwargs: Dict[str, Any]) -> Any:
+    try:
+        key = tuple(sorted(kwargs.items()))
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
+def _cached(cache: WeakKeyDictionary, owner: Any, key: Any) -> Any:
+    if key is None:
+        return None
+
+    try:
+        return cache.get(owner, {}).get(key)
+    except TypeError:  # the owner can not be weakly referenced
+        return None
+
+
+def _store(cache: WeakKeyDictionary, owner: Any, key: Any, schema: Schema):
+    if key is None:
+        return
+
+    try:
+        cache.setdefault(owner, {})[key] = schema
+    except TypeError:
+        pass
+
+
+def recursive_schemas() -> Dict[str, Schema]:
+    return {_component_name(cls): schema for cls, schema in list(_recursive.items())}
+
+
+def release():
+    # The model caches are shared by every app in the process. Only the serialized copies are dropped, so
+    # other apps lose nothing but the cached serialization and rebuild it on their next use.
+    for cache in (_models_cache, _annotations_cache):
+        for schemas in list(cache.values()):
+            for schema in schemas.values():
+                schema.release()
+
+    for schema in list(_recursive.values()):
+        schema.release()
+
+
+def model_schemas() -> Dict[str, Schema]:
+    return {cls.__name__: schemas[()] for cls, schemas in list(_models_cache.items()) if () in schemas}
+
+
+def _fields(cls: type) -> Tuple[Dict[str, Schema], List[str]]:
+    hints = _type_hints(cls)
+
+    if dataclasses.is_dataclass(cls):
+        items = [
+            (x.name, hints.get(x.name, x.type), x.default, x.default is dataclasses.MISSING and
+             x.default_factory is dataclasses.MISSING) for x in dataclasses.fields(cls)
+        ]
+    elif attr is not None and attr.has(cls):
+        items = [
+            (x.name, hints.get(x.name, x.type), x.default, x.default is attr.NOTHING) for x in attr.fields(cls)
+        ]
+    else:
+        hidden = {k for k, v in hints.items() if getattr(v, '__origin__', None) is ClassVar}
+        hints = {k: v for k, v in hints.items() if k not in hidden}
+        values = {x: v for x, v in cls.__dict__.items() if not x.startswith('_') and x not in hidden}
+
+        return {k: Schema.make(v) for k, v in {**hints, **values}.items()}, []
+
+    properties = {}
+
+    for name, hint, default, required in items:
+        if isinstance(default, (bool, int, float, str)) and not isinstance(default, Enum):
+            properties[name] = Schema.make(hint if hint is not None else Any, default=default)
+        else:
+            properties[name] = Schema.make(hint if hint is not None else Any)
+
+    return properties, [name for name, hint, default, required in items if required]
+
+
+_annotations_cache = WeakKeyDictionary()  # type: Dict[Any, Dict[tuple, Schema]]
+
+
+def _is_annotation(value: Any) -> bool:
+    if value is Any or hasattr(value, '__origin__'):
+        return True
+
+    return isinstance(value, type) and issubclass(value, Enum)
+
+
+def _annotation(value: Any, **kwargs) -> Schema:
+    key = _key(kwargs)
+    schema = _cached(_annotations_cache, value, key)
+
+    if schema is not None:
+        counters['cached'] += 1
+
+        return schema
+
+    schema = _convert(value, **kwargs)
+    _store(_annotations_cache, value, key, schema)
+
+    return schema
+
+
+def _convert(value: Any, **kwargs) -> Schema:
+    if value is Any:
+        return Schema(**kwargs)
+
+    if isinstance(value, type) and issubclass(value, Enum):
+        return _enum([x.value for x in value], **kwargs)
+
+    if hasattr(value, '__metadata__'):
+        return Schema.make(value.__origin__, **kwargs)
+
+    origin = value.__origin__
+    args = [x for x in getattr(value, '__args__', None) or () if not isinstance(x, TypeVar)]
+
+    if origin is Union:
+        types = [x for x in args if x is not type(None)]
+
+        if len(types) < len(args):
+            kwargs.setdefault('nullable', True)
+
+        if len(types) == 1:
+            return Schema.make(types[0], **kwargs)
+
+        return Schema(oneOf=[Schema.make(x) for x in types], **kwargs)
+
+    if Literal is not None and origin is Literal:
+        return _enum(args, **kwargs)
+
+    if not isinstance(origin, type):
+        return Schema(**kwargs)
+
+    if issubclass(origin, collections.abc.Mapping):
+        if len(args) == 2:
+            kwargs.setdefault('additionalProperties', Schema.make(args[1]))
+
+        return Object(**kwargs)
+
+    if issubclass(origin, tuple) and args and args[-1] is not Ellipsis:
+        kwargs.setdefault('minItems', len(args))
+        kwargs.setdefault('maxItems', len(args))
+
+        items = [Schema.make(x) for x in args]
+
+        return Array(items[0] if len(set(args)) == 1 else Schema(oneOf=items), **kwargs)
+
+    if issubclass(origin, (str, bytes)):
+        return Schema.make(origin, **kwargs)
+
+    if issubclass(origin, collections.abc.Iterable):
+        if issubclass(origin, collections.abc.Set):
+            kwargs.setdefault('uniqueItems', True)
+
+        return Array(Schema.make(args[0]) if args else Schema(), **kwargs)
+
+    if origin is type or issubclass(origin, collections.abc.Callable):
+        return Schema(**kwargs)
+
+    return Schema.make(origin, **kwargs)
+
+
+def _enum(values: List[Any], **kwargs) -> Schema:
+    kinds = {type(x) for x in values}
+    kind = kinds.pop() if len(kinds) == 1 else None
+
+    if kind in _PRIMITIVES:
+        return _PRIMITIVES[kind](enum=list(values), **kwargs)
+
+    return Schema(enum=list(values), **kwargs)
+
+
 def _properties(value: object) -> Dict:
     fields = {x: v for x, v in value.__dict__.items() if not x.startswith('_')}
 
-    return {**get_type_hints(value.__class__), **fields}
+    return {**_type_hints(value.__class__), **fields}
+
+
+_hints_cache = WeakKeyDictionary()  # type: Dict[type, Dict[str, Any]]
+_allowed_cache = WeakKeyDictionary()  # type: Dict[type, FrozenSet[str]]
+
+
+def _type_hints(cls: type) -> Dict:
+    hints = _hints_cache.get(cls)
+
+    if hints is None:
+        try:
+            hints = get_type_hints(cls)
+        except (NameError, TypeError):
+            hints = dict(getattr(cls, '__annotations__', {}))
+
+        _hints_cache[cls] = hints
+
+    return hints
+
+
+def _allowed(cls: type) -> FrozenSet[str]:
+    allowed = _allowed_cache.get(cls)
+
+    if allowed is None:
+        allowed = _allowed_cache[cls] = frozenset(_type_hints(cls))
+
+    return allowed
@@ -0,0 +1,309 @@
+import re
+
+from typing import Any, Callable, Dict, List
+from sanic.exceptions import InvalidUsage
+
+_TYPES = {
+    'integer': 'isinstance({0}, int) and not isinstance({0}, bool)',
+    'number': 'isinstance({0}, (int, float)) and not isinstance({0}, bool)',
+    'string': 'isinstance({0}, str)',
+    'boolean': 'isinstance({0}, bool)',
+    'array': 'isinstance({0}, list)',
+    'object': 'isinstance({0}, dict)',
+}
+
+_BOOLEANS = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+
+def _boolean(value: str) -> bool:
+    return _BOOLEANS[value.lower()]
+
+
+_COERCE = {
+    'integer': int,
+    'number': float,
+    'boolean': _boolean,
+}
+
+_SOURCES = {
+    'query': 'request.args',
+    'header': 'request.headers',
+    'cookie': 'request.cookies',
+}
+
+
+class Compiler:
+    _schemas: Dict[str, Dict]
+    _namespace: Dict[str, Any]
+    _functions: Dict[str, str]
+    _sources: List[str]
+    _counter: int
+
+    def __init__(self, schemas: Dict[str, Dict] = None):
+        self._schemas = schemas or {}
+        self._namespace = {'InvalidUsage': InvalidUsage, '_missing': object()}
+        self._functions = {}
+        self._sources = []
+        self._counter = 0
+
+    def operation(self, operation: Dict, name: str = 'validate') -> Callable:
+        lines = ['def %s(request):' % name, '    errors = []']
+
+        for parameter in operation.get('parameters') or []:
+            lines.extend(self._parameter(parameter))
+
+        body = operation.get('requestBody')
+
+        if body:
+            lines.extend(self._body(body))
+
+        lines.append('    if errors:')
+        lines.append("        raise InvalidUsage('; '.join(errors))")
+
+        return self._finish(lines, name)
+
+    def schema(self, schema: Dict, name: str = 'validate') -> Callable:
+        function = self._function(schema)
+        lines = [
+            'def %s(value, path=%r):' % (name, 'value'),
+            '    errors = []',
+            '    %s(value, path, errors)' % function,
+            '    return errors',
+        ]
+
+        return self._finish(lines, name)
+
+    def _finish(self, lines: List[str], name: str) -> Callable:
+        source = '\n'.join(self._sources + lines) + '\n'
+        namespace = dict(self._namespace)
+
+        exec(compile(source, '<openapi-validator %s>' % name, 'exec'), namespace)
+
+        function = namespace[name]
+        function.__source__ = source
+
+        return function
+
+    def _var(self, prefix: str = '_v') -> str:
+        self._counter += 1
+
+        return '%s%d' % (prefix, self._counter)
+
+    def _const(self, value: Any) -> str:
+        name = self._var('_c')
+        self._namespace[name] = value
+
+        return name
+
+    def _parameter(self, parameter: Dict) -> List[str]:
+        location = parameter.get('in')
+        name = parameter.get('name')
+        schema = parameter.get('schema') or {}
+
+        if location not in _SOURCES:
+            return []
+
+        path = repr('%s.%s' % (location, name))
+        raw = self._var('_r')
+        value = self._var()
+        _type = schema.get('type')
+        lines = []
+
+        if _type == 'array' and location == 'query':
+            coerce = _COERCE.get((schema.get('items') or {}).get('type'))
+            lines.append('    %s = request.args.getlist(%r) or None' % (raw, name))
+            convert = '[%s(x) for x in %s]' % (self._const(coerce), raw) if coerce else raw
+        else:
+            coerce = _COERCE.get(_type)
+            lines.append('    %s = %s.get(%r)' % (raw, _SOURCES[location], name))
+            convert = '%s(%s)' % (self._const(coerce), raw) if coerce else raw
+
+        lines.append('    if %s is None:' % raw)
+
+        if parameter.get('required'):
+            lines.append("        errors.append(%s + ': is required')" % path)
+        else:
+            lines.append('        pass')
+
+        lines.append('    else:')
+        lines.append('        try:')
+        lines.append('            %s = %s' % (value, convert))
+        lines.append('        except (KeyError, ValueError):')
+        lines.append("            errors.append(%s + ': expected %s')" % (path, _type))
+        lines.append('        else:')
+        lines.extend(self._schema(schema, value, path, 3) or ['            pass'])
+
+        return lines
+
+    def _body(self, body: Dict) -> List[str]:
+        content = body.get('content') or {}
+        media = content.get('application/json') or content.get('*/*')
+
+        if not media or not media.get('schema'):
+            return []
+
+        lines = ['    if request.body:']
+        lines.append('        body = request.json')
+        lines.extend(self._schema(media['schema'], 'body', repr('body'), 2))
+
+        if body.get('required'):
+            lines.append('    else:')
+            lines.append("        errors.append('body: is required')")
+
+        return lines
+
+    def _function(self, schema: Dict) -> str:
+        name = self._var('_f')
+        self._define(name, schema)
+
+        return name
+
+    def _ref(self, ref: str) -> str:
+        if ref in self._functions:
+            return self._functions[ref]
+
+        name = self._functions[ref] = self._var('_ref')
+        schema = self._schemas.get(ref.rsplit('/', 1)[-1], {})
+
+        self._define(name, schema)
+
+        return name
+
+    def _define(self, name: str, schema: Dict):
+        lines = ['def %s(value, path, errors):' % name]
+        lines.extend(self._schema(schema, 'value', 'path', 1) or ['    pass'])
+
+        self._sources.append('\n'.join(lines) + '\n')
+
+    def _schema(self, schema: Dict, var: str, path: str, depth: int) -> List[str]:
+        pad = '    ' * depth
+
+        if '$ref' in schema:
+            return [pad + '%s(%s, %s, errors)' % (self._ref(schema['$ref']), var, path)]
+
+        _type = schema.get('type')
+
+        if _type not in _TYPES:
+            return self._checks(schema, var, path, depth)
+
+        checks = self._checks(schema, var, path, depth + 1)
+        lines = [pad + 'if %s is None:' % var]
+
+        if schema.get('nullable'):
+            lines.append(pad + '    pass')
+        else:
+            lines.append(pad + "    errors.append(%s + ': may not be null')" % path)
+
+        lines.append(pad + 'elif not (%s):' % _TYPES[_type].format(var))
+        lines.append(pad + "    errors.append(%s + ': expected %s')" % (path, _type))
+
+        if checks:
+            lines.append(pad + 'else:')
+            lines.extend(checks)
+
+        return lines
+
+    def _checks(self, schema: Dict, var: str, path: str, depth: int) -> List[str]:
+        pad = '    ' * depth
+        lines = []
+
+        def check(condition: str, message: str):
+            lines.append(pad + 'if %s:' % condition)
+            lines.append(pad + '    errors.append(%s + %r)' % (path, ': ' + message))
+
+        if 'enum' in schema:
+            check('%s not in %s' % (var, self._const(tuple(schema['enum']))), 'is not one of the allowed values')
+
+        if schema.get('minimum') is not None:
+            operator = '<=' if schema.get('exclusiveMinimum') else '<'
+            check('%s %s %r' % (var, operator, schema['minimum']), 'is less than %r' % schema['minimum'])
+
+        if schema.get('maximum') is not None:
+            operator = '>=' if schema.get('exclusiveMaximum') else '>'
+            check('%s %s %r' % (var, operator, schema['maximum']), 'is greater than %r' % schema['maximum'])
+
+        if schema.get('multipleOf'):
+            check('%s %% %r' % (var, schema['multipleOf']), 'is not a multiple of %r' % schema['multipleOf'])
+
+        if schema.get('minLength') is not None:
+            check('len(%s) < %d' % (var, schema['minLength']), 'is shorter than %d' % schema['minLength'])
+
+        if schema.get('maxLength') is not None:
+            check('len(%s) > %d' % (var, schema['maxLength']), 'is longer than %d' % schema['maxLength'])
+
+        if schema.get('pattern'):
+            pattern = self._const(re.compile(schema['pattern']))
+            check('%s.search(%s) is None' % (pattern, var), 'does not match %r' % schema['pattern'])
+
+        if schema.get('minItems') is not None:
+            check('len(%s) < %d' % (var, schema['minItems']), 'has fewer than %d items' % schema['minItems'])
+
+        if schema.get('maxItems') is not None:
+            check('len(%s) > %d' % (var, schema['maxItems']), 'has more than %d items' % schema['maxItems'])
+
+        if schema.get('uniqueItems'):
+            check('len(set(map(repr, %s))) != len(%s)' % (var, var), 'has duplicate items')
+
+        if schema.get('minProperties') is not None:
+            check('len(%s) < %d' % (var, schema['minProperties']), 'has too few properties')
+
+        if schema.get('maxProperties') is not None:
+            check('len(%s) > %d' % (var, schema['maxProperties']), 'has too many properties')
+
+        if isinstance(schema.get('items'), dict):
+            index, item = self._var('_i'), self._var()
+            nested = self._schema(schema['items'], item, '(%s + "[%%d]" %% %s)' % (path, index), depth + 1)
+
+            if nested:
+                lines.append(pad + 'for %s, %s in enumerate(%s):' % (index, item, var))
+                lines.extend(nested)
+
+        if isinstance(schema.get('properties'), dict):
+            required = set(schema['required']) if isinstance(schema.get('required'), list) else set()
+
+            for name, prop in schema['properties'].items():
+                item = self._var()
+                nested = self._schema(prop, item, '(%s + %r)' % (path, '.' + name), depth + 1)
+
+                lines.append(pad + '%s = %s.get(%r, _missing)' % (item, var, name))
+                lines.append(pad + 'if %s is _missing:' % item)
+
+                if name in required or prop.get('required') is True:
+                    lines.append(pad + '    errors.append(%s + %r)' % (path, ': missing property %s' % name))
+                else:
+                    lines.append(pad + '    pass')
+
+                if nested:
+                    lines.append(pad + 'else:')
+                    lines.extend(nested)
+
+        for sub in schema.get('allOf') or []:
+            lines.extend(self._schema(sub, var, path, depth))
+
+        for keyword in ('anyOf', 'oneOf'):
+            if not schema.get(keyword):
+                continue
+
+            functions = ', '.join(self._function(sub) for sub in schema[keyword])
+            matches = self._var('_m')
+
+            lines.append(pad + '%s = 0' % matches)
+            lines.append(pad + 'for _f in (%s,):' % functions)
+            lines.append(pad + '    _e = []')
+            lines.append(pad + '    _f(%s, %s, _e)' % (var, path))
+            lines.append(pad + '    %s += not _e' % matches)
+
+            if keyword == 'anyOf':
+                check('not %s' % matches, 'does not match any schema')
+            else:
+                check('%s != 1' % matches, 'does not match exactly one schema')
+
+        return lines
+
+
+def compile_validator(operation: Dict, schemas: Dict[str, Dict] = None, name: str = 'validate') -> Callable:
+    return Compiler(schemas).operation(operation, name)
+
+
+def compile_schema(schema: Dict, schemas: Dict[str, Dict] = None, name: str = 'validate') -> Callable:
+    return Compiler(schemas).schema(schema, name)
@@ -12,7 +12,14 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type='text/markdown',
     url='https://github.com/zloyuser/sanic-openapi3',
-    packages=setuptools.find_packages(),
+    python_requires='>=3.8',
+    packages=setuptools.find_packages(exclude=('benchmarks', 'benchmarks.*')),
+    extras_require={
+        'yaml': ['PyYAML'],
+    },
+    entry_points={
+        'console_scripts': ['sanic-openapi3 = sanic_openapi3.__main__:main'],
+    },
     classifiers=(
         'Programming Language :: Python :: 3',
         'License :: OSI Approved :: MIT License',
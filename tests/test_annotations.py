@@ -0,0 +1,83 @@
+import pytest
+
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, ClassVar, Dict, List, Optional, Set, Tuple, Union
+from sanic_openapi3.types import Schema, recursive_schemas
+
+
+class Color(Enum):
+    RED = 'red'
+    BLUE = 'blue'
+
+
+@dataclass
+class Branch:
+    name: str
+    color: Color
+    children: List['Branch'] = field(default_factory=list)
+    weight: Optional[float] = None
+    size: int = 3
+
+
+@dataclass
+class Point:
+    x: int
+    y: int = 0
+
+
+class Annotated:
+    values: List[int]
+    lookup: Dict[str, Point]
+    count: ClassVar[int] = 0
+
+
+def test_generics():
+    assert Schema.make(List[int]).serialize() == {'type': 'array', 'items': {'type': 'integer', 'format': 'int32'}}
+    assert Schema.make(Set[str]).serialize() == {'type': 'array', 'items': {'type': 'string'}, 'uniqueItems': True}
+    assert Schema.make(Optional[str]).serialize() == {'type': 'string', 'nullable': True}
+    assert Schema.make(Union[int, str]).serialize() == {
+        'oneOf': [{'type': 'integer', 'format': 'int32'}, {'type': 'string'}]
+    }
+    assert Schema.make(Tuple[int, int]).serialize()['maxItems'] == 2
+    assert Schema.make(Any).serialize() == {}
+
+
+def test_generics_are_cached():
+    assert Schema.make(List[Point]) is Schema.make(List[Point])
+    assert Schema.make(Color) is Schema.make(Color)
+
+
+def test_enum():
+    assert Schema.make(Color).serialize() == {'type': 'string', 'enum': ['red', 'blue']}
+
+
+def test_dataclass():
+    schema = Schema.make(Branch).serialize()
+
+    assert schema['required'] == ['name', 'color']
+    assert schema['properties']['children'] == {'type': 'array', 'items': {'$ref': '#/components/schemas/Branch'}}
+    assert schema['properties']['weight']['nullable'] is True
+    assert schema['properties']['size']['default'] == 3
+    assert 'Branch' in recursive_schemas()
+
+
+def test_attrs():
+    attr = pytest.importorskip('attr')
+
+    @attr.s(auto_attribs=True)
+    class Vector:
+        x: int
+        y: int = 0
+
+    schema = Schema.make(Vector).serialize()
+
+    assert schema['required'] == ['x']
+    assert schema['properties']['y'] == {'type': 'integer', 'format': 'int32', 'default': 0}
+
+
+def test_annotations_only():
+    schema = Schema.make(Annotated).serialize()
+
+    assert list(schema['properties']) == ['values', 'lookup']
+    assert schema['properties']['lookup']['additionalProperties']['required'] == ['x']
@@ -0,0 +1,57 @@
+import os
+import sys
+
+from typing import Dict, List, Optional
+
+from sanic import Sanic
+from sanic_openapi3 import blueprint
+from sanic_openapi3.cache import SpecCache, fingerprint
+
+
+class Model:
+    name = str
+    tags = [str]
+
+
+def test_fingerprint_is_stable():
+    assert fingerprint({'a': [Model, 1]}) == fingerprint({'a': [Model, 1]})
+    assert fingerprint({'a': [Model, 1]}) != fingerprint({'a': [Model, 2]})
+
+
+def test_fingerprint_annotations():
+    class Other:
+        title = str
+
+    assert fingerprint(List[Model]) == fingerprint(List[Model])
+    assert fingerprint(List[Model]) != fingerprint(List[Other])
+    assert fingerprint(Optional[Model]) != fingerprint(Optional[Other])
+    assert fingerprint(Dict[str, Model]) != fingerprint(Dict[str, Other])
+
+    if sys.version_info >= (3, 9):
+        assert fingerprint(list[Model]) != fingerprint(list[Other])
+
+
+def test_cache_load_store(tmp_path):
+    cache = SpecCache(str(tmp_path / 'cache'), limit=2)
+
+    assert cache.load('a') is None
+
+    cache.store('a', b'{}')
+    cache.store('b', b'{}')
+    cache.store('c', b'{"c":1}')
+
+    assert cache.load('c') == b'{"c":1}'
+    assert len(os.listdir(str(tmp_path / 'cache'))) == 2
+
+
+def test_cache_dir(tmp_path):
+    app = Sanic('test_cache_dir')
+    app.blueprint(blueprint)
+    app.config.OPENAPI_CACHE_DIR = str(tmp_path)
+
+    request, first = app.test_client.get('/openapi.json')
+    request, second = app.test_client.get('/openapi.json')
+
+    assert first.status == second.status == 200
+    assert first.body == second.body
+    assert len(os.listdir(str(tmp_path))) == 1
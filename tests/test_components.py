@@ -0,0 +1,54 @@
+from sanic_openapi3.builders import ComponentsBuilder, _references
+from sanic_openapi3.definitions import Response
+from sanic_openapi3.types import Object, Reference, Schema
+
+
+class Pet:
+    name = str
+    age = int
+
+
+class Owner:
+    name = str
+    pets = [Pet]
+
+
+def _spec(*responses):
+    return {
+        'paths': {
+            '/%d' % i: {'get': {'responses': {'200': response.serialize()}}} for i, response in enumerate(responses)
+        }
+    }
+
+
+def _schema(spec, path):
+    return spec['paths'][path]['get']['responses']['200']['content']['*/*']['schema']
+
+
+def test_extract_repeated_schemas():
+    spec = ComponentsBuilder().extract(_spec(Response.make(Pet), Response.make(Owner), Response.make([Pet])))
+
+    assert _schema(spec, '/0') == {'$ref': '#/components/schemas/Pet'}
+    assert _schema(spec, '/2')['items'] == {'$ref': '#/components/schemas/Pet'}
+    assert spec['components']['schemas']['Pet']['properties']['age']['type'] == 'integer'
+    assert 'Owner' not in spec['components']['schemas']
+
+
+def test_extract_threshold():
+    spec = ComponentsBuilder().extract(_spec(Response.make(Pet), Response.make([Pet])), threshold=2)
+
+    assert 'Pet' not in spec['components']['schemas']
+    assert _schema(spec, '/0')['type'] == 'object'
+
+
+def test_extract_keeps_property_order():
+    spec = ComponentsBuilder().extract(_spec(Response.make(Pet), Response.make([Pet])))
+
+    assert list(spec['components']['schemas']['Pet']['properties']) == ['name', 'age']
+
+
+def test_references_do_not_serialize():
+    schema = Object({'child': Reference('#/components/schemas/Child'), 'count': Schema.make(int)})
+
+    assert _references([{'/': Response.make(schema)}]) == {'Child'}
+    assert schema._Definition__serialized is None
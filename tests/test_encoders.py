@@ -0,0 +1,53 @@
+import pytest
+
+from datetime import date, datetime
+from sanic import Sanic
+from sanic_openapi3 import blueprint as openapi_blueprint
+from sanic_openapi3.encoders import ENCODERS, get_encoder
+
+VALUE = {
+    'title': 'Café / Bar',
+    'default': date(2020, 1, 2),
+    'example': datetime(2020, 1, 2, 3, 4, 5),
+    'responses': {200: {'description': 'OK'}},
+    'items': [1, 2.5, True, None],
+}
+
+
+@pytest.mark.parametrize('name', sorted(ENCODERS))
+def test_encoders_agree(name):
+    assert get_encoder(name)(VALUE) == get_encoder('json')(VALUE)
+
+
+def test_encoder_dates():
+    assert get_encoder()(VALUE).startswith('{"title":"Café / Bar","default":"2020-01-02","example":"2020-01-02T03:04:05"'.encode())
+
+
+@pytest.mark.parametrize('name', sorted(ENCODERS))
+def test_encoders_reject_objects(name):
+    with pytest.raises(TypeError):
+        get_encoder(name)({'value': object()})
+
+
+def test_encoder_unknown():
+    with pytest.raises(ValueError):
+        get_encoder('missing')
+
+    assert get_encoder(str) is str
+
+
+def test_encoder_config():
+    calls = []
+
+    def encoder(value):
+        calls.append(value)
+
+        return get_encoder('json')(value)
+
+    app = Sanic('test_encoder_config')
+    app.blueprint(openapi_blueprint)
+    app.config.OPENAPI_JSON_ENCODER = encoder
+
+    request, response = app.test_client.get('/openapi.json')
+    assert response.status == 200
+    assert calls[0]['openapi'] == '3.0.0'
@@ -1,5 +1,32 @@
+import asyncio
+import gc
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from json import loads as json_loads
 from sanic import Sanic
-from sanic_openapi3 import openapi_blueprint
+from sanic.response import text
+from sanic_openapi3 import blueprint as openapi_blueprint, openapi
+from sanic_openapi3.builders import ComponentsBuilder, OperationBuilder
+from sanic_openapi3.documents import Document, LazyDocument
+from sanic_openapi3.components import scheme
+from sanic_openapi3.types import Schema
+from sanic_openapi3.main import operations, export, build, build_spec, background, add_operation, \
+    remove_operation, registry, slices
+
+
+@contextmanager
+def event_loop():
+    # Executor threads that outlive the test would keep the parallel builds of later tests from forking.
+    loop, executor = asyncio.new_event_loop(), ThreadPoolExecutor()
+    loop.set_default_executor(executor)
+
+    try:
+        yield loop
+    finally:
+        loop.close()
+        executor.shutdown()
 
 # ------------------------------------------------------------ #
 #  GET
@@ -11,3 +38,475 @@ def test_get_docs():
 
     request, response = app.test_client.get('/openapi.json')
     assert response.status == 200
+
+
+def test_get_docs_cache_headers():
+    app = Sanic('test_get_cache_headers')
+    app.blueprint(openapi_blueprint)
+
+    request, response = app.test_client.get('/openapi.json')
+    assert response.status == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert response.headers['ETag'].startswith('"')
+
+
+def test_get_docs_not_modified():
+    app = Sanic('test_get_not_modified')
+    app.blueprint(openapi_blueprint)
+
+    request, response = app.test_client.get('/openapi.json')
+    etag = response.headers['ETag']
+
+    request, response = app.test_client.get('/openapi.json', headers={'If-None-Match': etag})
+    assert response.status == 304
+    assert response.headers['ETag'] == etag
+    assert response.body == b''
+
+    request, response = app.test_client.get('/openapi.json', headers={'If-None-Match': '"stale"'})
+    assert response.status == 200
+
+
+def test_get_docs_gzip():
+    app = Sanic('test_get_gzip')
+    app.blueprint(openapi_blueprint)
+
+    request, plain = app.test_client.get('/openapi.json', headers={'Accept-Encoding': 'identity'})
+    request, packed = app.test_client.get('/openapi.json', headers={'Accept-Encoding': 'gzip'})
+
+    assert packed.status == 200
+    assert packed.headers['Vary'] == 'Accept-Encoding'
+    assert packed.headers['Content-Encoding'] == 'gzip'
+    assert packed.headers['ETag'] != plain.headers['ETag']
+    assert packed.json == plain.json
+
+
+def test_get_docs_from_file(tmp_path):
+    app = Sanic('test_get_from_file')
+    app.blueprint(openapi_blueprint)
+
+    path = str(tmp_path / 'openapi.json')
+    app.config.OPENAPI_TITLE = 'Exported'
+
+    export(app, path)
+
+    app.config.OPENAPI_TITLE = 'Built'
+    app.config.OPENAPI_SPEC_FILE = path
+
+    request, response = app.test_client.get('/openapi.json')
+    assert response.status == 200
+    assert response.json['info']['title'] == 'Exported'
+
+
+def test_get_docs_lazy():
+    app = Sanic('test_get_lazy')
+    app.blueprint(openapi_blueprint)
+    app.config.OPENAPI_LAZY = True
+    app.config.OPENAPI_TITLE = 'Lazy'
+
+    request, response = app.test_client.get('/openapi.json')
+    assert response.status == 200
+    assert response.json['info']['title'] == 'Lazy'
+    assert isinstance(registry(app).document, LazyDocument)
+
+
+def test_lazy_document_builds_in_executor():
+    threads = []
+
+    def factory():
+        threads.append(threading.get_ident())
+
+        return Document(b'{}')
+
+    _document = LazyDocument(factory)
+
+    with event_loop() as loop:
+        assert loop.run_until_complete(_document.get()) is loop.run_until_complete(_document.get())
+
+    assert threads != [threading.get_ident()] and len(threads) == 1
+
+
+def test_get_docs_lazy_resolves_on_build():
+    app = Sanic('test_get_lazy_resolves')
+    app.blueprint(openapi_blueprint)
+    app.config.OPENAPI_LAZY = True
+
+    class Lazy:
+        name = str
+
+    @openapi.response(200, Lazy)
+    def lazy(request):
+        return text('')
+
+    app.add_route(lazy, '/lazy')
+    build_spec(app, None)
+
+    operation, = registry(app).endpoints.values()
+    assert not operation.responses
+
+    with event_loop() as loop:
+        spec = json_loads(loop.run_until_complete(registry(app).document.get()).body)
+
+    assert operation.responses
+    assert '200' in spec['paths']['/lazy']['get']['responses']
+
+
+def test_get_docs_stats():
+    app = Sanic('test_get_stats')
+    app.blueprint(openapi_blueprint)
+
+    reports = []
+    app.config.OPENAPI_STATS = True
+    app.config.OPENAPI_STATS_CALLBACK = reports.append
+
+    request, response = app.test_client.get('/openapi.json/_stats')
+    assert response.status == 200
+    assert response.json['counters']['paths'] == 0
+    assert {'globals', 'tagging', 'routes', 'operations', 'components', 'serialization'} <= set(response.json['phases'])
+    assert reports[0]['counters'] == response.json['counters']
+
+
+def test_get_docs_stats_per_build():
+    reports = []
+
+    def factory(name):
+        app = Sanic(name)
+        app.config.OPENAPI_STATS_CALLBACK = reports.append
+
+        class Counted:
+            name = str
+
+        @openapi.response(200, Counted)
+        def counted(request):
+            return text('')
+
+        app.add_route(counted, '/counted')
+        build_spec(app, None)
+
+    factory('test_stats_first')
+    factory('test_stats_second')
+
+    assert reports[0]['counters']['schemas_models'] == reports[1]['counters']['schemas_models'] == 1
+
+
+def test_add_and_remove_operation():
+    app = Sanic('test_add_operation')
+    app.blueprint(openapi_blueprint)
+
+    build_spec(app, None)
+    etag = registry(app).document.etag
+
+    @openapi.summary('Added at runtime')
+    def added(request, item_id):
+        return text('')
+
+    app.add_route(added, '/added/<item_id:int>')
+    add_operation(app, '/added/<item_id:int>')
+
+    spec = json_loads(registry(app).document.body)
+    assert registry(app).document.etag != etag
+    assert spec['paths']['/added/{item_id}']['get']['summary'] == 'Added at runtime'
+
+    remove_operation(app, '/added/<item_id:int>')
+
+    assert '/added/{item_id}' not in json_loads(registry(app).document.body)['paths']
+
+
+def test_add_operation_resets_slices():
+    app = Sanic('test_add_operation_slices')
+    app.blueprint(openapi_blueprint)
+
+    build_spec(app, None)
+    index = slices(app, registry(app).document)
+
+    @openapi.tag('added')
+    def added(request):
+        return text('')
+
+    app.add_route(added, '/added')
+    add_operation(app, '/added')
+
+    assert registry(app).index is None
+    assert slices(app, registry(app).document) is not index
+    assert list(json_loads(slices(app, registry(app).document).slice('added', None).body)['paths']) == ['/added']
+
+
+def test_build_detached():
+    app = Sanic('test_build_detached')
+
+    class Detached:
+        name = str
+
+    @openapi.response(200, Detached)
+    def detached(request):
+        return text('')
+
+    app.add_route(detached, '/detached')
+
+    schema = build(app)['paths']['/detached']['get']['responses'][200]['content']['*/*']['schema']
+    schema['properties'].clear()
+
+    schema = build(app)['paths']['/detached']['get']['responses'][200]['content']['*/*']['schema']
+    assert schema['properties'] == {'name': {'type': 'string'}}
+
+
+def test_builder_released():
+    def factory(name, updates):
+        app = Sanic(name)
+        app.config.OPENAPI_RUNTIME_UPDATES = updates
+        app.blueprint(openapi_blueprint)
+
+        @openapi.summary('Released')
+        def released(request):
+            return text('')
+
+        app.add_route(released, '/released')
+        build_spec(app, None)
+
+        return registry(app)
+
+    released, kept = factory('test_builder_released', False), factory('test_builder_kept', True)
+
+    assert not released.collected and not released.specification._paths and not released.specification._fragments
+    assert kept.collected and list(kept.specification._fragments) == ['/released']
+
+
+def test_add_operation_spec_file(tmpdir):
+    path = tmpdir.join('openapi.json')
+    path.write('{"openapi": "3.0.0", "info": {"title": "File", "version": "1.0.0"}, "paths": {}}')
+
+    app = Sanic('test_add_operation_spec_file')
+    app.config.OPENAPI_SPEC_FILE = str(path)
+    app.blueprint(openapi_blueprint)
+
+    @app.route('/existing')
+    @openapi.summary('Existing')
+    def existing(request):
+        return text('')
+
+    build_spec(app, None)
+
+    @openapi.summary('Added at runtime')
+    def added(request):
+        return text('')
+
+    app.add_route(added, '/added')
+    add_operation(app, '/added')
+
+    spec = json_loads(registry(app).document.body)
+    assert spec['info']['title'] == 'API'
+    assert set(spec['paths']) == {'/existing', '/added'}
+
+
+def test_get_docs_streamed():
+    app = Sanic('test_get_streamed')
+    app.blueprint(openapi_blueprint)
+    app.config.OPENAPI_STREAM = True
+    app.config.OPENAPI_TITLE = 'Streamed'
+
+    request, response = app.test_client.get('/openapi.json')
+    assert response.status == 200
+    assert response.json['info']['title'] == 'Streamed'
+    assert response.headers['ETag'] == registry(app).document.etag
+
+
+def test_get_docs_slices():
+    app = Sanic('test_get_slices')
+    app.blueprint(openapi_blueprint)
+
+    @app.get('/sliced')
+    @openapi.tag('sliced')
+    def sliced(request):
+        return text('')
+
+    request, response = app.test_client.get('/openapi.json?tag=sliced')
+    assert response.status == 200
+    assert list(response.json['paths']) == ['/sliced']
+    assert response.json['tags'] == [{'name': 'sliced'}]
+
+    request, response = app.test_client.get('/openapi.json?path=/sliced')
+    assert list(response.json['paths']) == ['/sliced']
+
+    request, repeated = app.test_client.get('/openapi.json?path=/sliced', headers={'If-None-Match': response.headers['ETag']})
+    assert repeated.status == 304
+
+    request, response = app.test_client.get('/openapi.json?tag=missing')
+    assert response.status == 404
+
+
+def test_get_docs_yaml():
+    yaml = pytest.importorskip('yaml')
+    app = Sanic('test_get_yaml')
+    app.blueprint(openapi_blueprint)
+    app.config.OPENAPI_YAML_URL = 'openapi.yaml'
+    app.config.OPENAPI_TITLE = 'YAML'
+
+    request, response = app.test_client.get('/openapi.yaml')
+    assert response.status == 200
+    assert response.headers['Content-Type'] == 'application/yaml'
+    assert yaml.safe_load(response.body)['info']['title'] == 'YAML'
+
+    request, response = app.test_client.get('/openapi.yaml', headers={'If-None-Match': response.headers['ETag']})
+    assert response.status == 304
+
+
+def test_export_yaml(tmp_path):
+    yaml = pytest.importorskip('yaml')
+    app = Sanic('test_export_yaml')
+    app.blueprint(openapi_blueprint)
+    app.config.OPENAPI_TITLE = 'Exported'
+
+    path = str(tmp_path / 'openapi.yml')
+    export(app, path)
+
+    with open(path) as fh:
+        assert yaml.safe_load(fh)['info']['title'] == 'Exported'
+
+
+def test_export_failure_removes_tmp(tmp_path):
+    def failing(value):
+        raise ValueError('Not encodable')
+
+    app = Sanic('test_export_failure')
+    app.config.OPENAPI_JSON_ENCODER = failing
+
+    with pytest.raises(ValueError):
+        export(app, str(tmp_path / 'openapi.json'))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_decorators_resolve_at_build():
+    app = Sanic('test_decorators_resolve')
+    app.blueprint(openapi_blueprint)
+
+    class Deferred:
+        name = str
+
+    @openapi.response(200, Deferred)
+    def deferred(request):
+        return text('')
+
+    app.add_route(deferred, '/deferred')
+    assert not operations[deferred].responses
+
+    scheme()(Deferred)
+
+    request, response = app.test_client.get('/openapi.json')
+    content = response.json['paths']['/deferred']['get']['responses']['200']['content']
+    assert content['*/*']['schema'] == {'$ref': '#/components/schemas/Deferred'}
+    assert response.json['components']['schemas']['Deferred']['properties'] == {'name': {'type': 'string'}}
+
+
+def test_get_docs_background():
+    app = Sanic('test_get_background')
+    app.blueprint(openapi_blueprint)
+    app.config.OPENAPI_BACKGROUND = True
+    app.config.OPENAPI_RETRY_AFTER = 5
+
+    with event_loop() as loop:
+        build_spec(app, loop)
+
+        response = registry(app).document.respond(None)
+        assert response.status == 503
+        assert response.headers['Retry-After'] == '5'
+
+        loop.run_until_complete(background(app, loop))
+
+    assert json_loads(registry(app).document.body)['openapi'] == '3.0.0'
+
+
+def test_get_docs_background_failure():
+    app = Sanic('test_get_background_failure')
+    app.blueprint(openapi_blueprint)
+    app.config.OPENAPI_BACKGROUND = True
+    app.config.OPENAPI_TITLE = object()
+
+    with event_loop() as loop:
+        build_spec(app, loop)
+        loop.run_until_complete(background(app, loop))
+
+    response = registry(app).document.respond(None)
+    assert response.status == 500
+    assert 'Retry-After' not in response.headers
+
+
+def test_resolve_from_threads():
+    operation = OperationBuilder()
+
+    for i in range(200):
+        operation.parameter('p%d' % i, Schema.make(int, description=str(i)))
+
+    seen = []
+
+    def resolve():
+        operation.resolve(ComponentsBuilder())
+        seen.append(len(operation.parameters))
+
+    threads = [threading.Thread(target=resolve) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert seen == [200] * 8
+
+
+def test_registries_per_app():
+    def factory(name):
+        app = Sanic(name)
+        app.blueprint(openapi_blueprint)
+
+        @openapi.summary(name)
+        def item(request, item_id):
+            return text('')
+
+        app.add_route(item, '/%s/<item_id:int>' % name)
+
+        return app
+
+    first, second = factory('test_registry_first'), factory('test_registry_second')
+
+    build_spec(first, None)
+    build_spec(first, None)
+    build_spec(second, None)
+
+    spec = json_loads(registry(first).document.body)
+    assert list(spec['paths']) == ['/test_registry_first/{item_id}']
+    assert len(spec['paths']['/test_registry_first/{item_id}']['get']['parameters']) == 1
+    assert list(json_loads(registry(second).document.body)['paths']) == ['/test_registry_second/{item_id}']
+
+    handlers = len(operations)
+    del first, second
+    Sanic._app_registry.pop('test_registry_first')
+    Sanic._app_registry.pop('test_registry_second')
+    gc.collect()
+
+    assert len(operations) == handlers - 2
+
+
+def test_recursive_components_per_app():
+    def factory(name):
+        app = Sanic(name)
+
+        class Tree:
+            name = str
+
+        Tree.children = [Tree]
+
+        @openapi.response(200, Tree)
+        def tree(request):
+            return text('')
+
+        app.add_route(tree, '/tree')
+
+        return app
+
+    first, second, plain = factory('test_recursive_first'), factory('test_recursive_second'), Sanic('test_plain')
+    first_schemas = set(build(first)['components']['schemas'])
+    second_schemas = set(build(second)['components']['schemas'])
+    plain_schemas = set(build(plain)['components'].get('schemas', {}))
+
+    assert len(first_schemas - plain_schemas) == len(second_schemas - plain_schemas) == 1
+    assert first_schemas - plain_schemas != second_schemas - plain_schemas
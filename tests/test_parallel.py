@@ -0,0 +1,92 @@
+import threading
+
+from sanic_openapi3.builders import ComponentsBuilder, OperationBuilder, SpecificationBuilder
+from sanic_openapi3.parallel import build_fragments, chunks
+from sanic_openapi3.types import Schema
+
+
+def _specification(count, schema=int):
+    specification = SpecificationBuilder(ComponentsBuilder())
+    specification.describe('API', '1.0.0')
+    specification.contact()
+    specification.license()
+
+    for i in range(count):
+        operation = OperationBuilder()
+        operation.parameter('page', schema)
+        operation.resolve(specification._components)
+        specification.operation('/items%d/{id}' % i, 'GET', operation)
+
+    return specification
+
+
+def test_chunks_keep_prefixes_together():
+    result = chunks(['/a/1', '/b/1', '/a/2', '/c', '/a/3'], 2)
+
+    assert sorted(map(sorted, result)) == [['/a/1', '/a/2', '/a/3'], ['/b/1', '/c']]
+
+
+def test_parallel_build_matches_serial():
+    specification = _specification(20)
+    parallel = specification.serialize(workers=2)
+
+    specification._fragments.clear()
+
+    assert parallel == specification.serialize()
+
+
+def test_parallel_build_falls_back(caplog):
+    specification = _specification(20, Schema.make(int, default=lambda: None))
+    spec = specification.serialize(workers=2)
+
+    assert len(spec['paths']) == 20
+    assert 'Parallel OpenAPI build failed' in caplog.text
+
+
+def test_parallel_build_derives_in_workers():
+    class Node:
+        name = str
+
+    Node.children = [Node]
+
+    specification = SpecificationBuilder(ComponentsBuilder())
+    specification.describe('API', '1.0.0')
+    specification.contact()
+    specification.license()
+
+    for i in range(20):
+        operation = OperationBuilder()
+        operation.response(200, Node)
+        specification.operation('/nodes%d' % i, 'GET', operation)
+
+    spec = specification.serialize(workers=2)
+
+    assert operation._pending
+    assert spec['components']['schemas']['Node']['properties']['children']['items'] == {
+        '$ref': '#/components/schemas/Node'
+    }
+
+
+def test_parallel_build_outside_main_thread():
+    specification = _specification(20)
+    paths, result = list(specification._paths), []
+
+    thread = threading.Thread(target=lambda: result.append(build_fragments(specification, paths, 2)))
+    thread.start()
+    thread.join()
+
+    assert result == [({}, {})]
+
+
+def test_parallel_build_with_other_threads():
+    specification = _specification(20)
+    paths, event = list(specification._paths), threading.Event()
+
+    thread = threading.Thread(target=event.wait)
+    thread.start()
+
+    try:
+        assert build_fragments(specification, paths, 2) == ({}, {})
+    finally:
+        event.set()
+        thread.join()
@@ -0,0 +1,30 @@
+from sanic_openapi3.paths import convert, parameters, parse
+
+
+def test_convert():
+    assert convert('/') == '/'
+    assert convert('/todo/') == '/todo'
+    assert convert('/todo/<todo_id:int>') == '/todo/{todo_id}'
+    assert convert('/a/<x>/b/<y:number>/<z:[a-z]{2,3}>') == '/a/{x}/b/{y}/{z}'
+    assert convert('/<id:int>/<id2:int>') == '/{id}/{id2}'
+
+
+def test_parameter_types():
+    schemas = {name: schema.serialize() for name, schema in parameters('/<a:int>/<b:number>/<c:uuid>/<d:path>/<e>')}
+
+    assert schemas['a'] == {'type': 'integer', 'format': 'int32'}
+    assert schemas['b'] == {'type': 'number', 'format': 'float'}
+    assert schemas['c'] == {'type': 'string', 'format': 'uuid'}
+    assert schemas['d'] == {'type': 'string'}
+    assert schemas['e'] == {'type': 'string'}
+
+
+def test_parameter_pattern():
+    (name, schema), = parameters('/<code:[A-Z]{3}>')
+
+    assert name == 'code'
+    assert schema.serialize() == {'type': 'string', 'pattern': '^[A-Z]{3}$'}
+
+
+def test_parse_is_memoized():
+    assert parse('/memo/<id:int>') is parse('/memo/<id:int>')
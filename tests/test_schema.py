@@ -0,0 +1,122 @@
+import gc
+import pytest
+
+from weakref import ref
+
+from sanic_openapi3 import types
+from sanic_openapi3.types import Schema, Object, Reference, recursive_schemas
+
+
+class Leaf:
+    name = str
+    size = int
+
+
+class Node:
+    name = str
+
+
+Node.children = [Node]
+
+
+def test_model_is_cached():
+    assert Schema.make(Leaf) is Schema.make(Leaf)
+    assert Schema.make(Leaf) is not Schema.make(Leaf, description='Leaf')
+
+
+def test_model_recursion():
+    schema = Schema.make(Node)
+
+    assert isinstance(schema, Object)
+    assert schema.serialize()['properties']['children']['items'] == {'$ref': '#/components/schemas/Node'}
+    assert recursive_schemas()['Node'] is schema
+
+
+def test_model_recursion_names():
+    def scope():
+        class Node:
+            name = str
+
+        Node.children = [Node]
+
+        return Node
+
+    Schema.make(Node)
+
+    other = scope()
+    schema = Schema.make(other, description='Other')
+    name = schema.serialize()['properties']['children']['items']['$ref'].rsplit('/', 1)[-1]
+
+    assert name != 'Node'
+    assert recursive_schemas()['Node'] is Schema.make(Node)
+    assert recursive_schemas()[name] is Schema.make(other)
+    assert 'description' not in recursive_schemas()[name].serialize()
+
+
+def test_model_recursion_ref():
+    assert isinstance(Schema.make([Node]).fields['items'], Object)
+    assert isinstance(Schema.make(Node).fields['properties']['children'].fields['items'], Reference)
+
+
+def test_primitives_are_shared():
+    assert Schema.make(int) is Schema.make(int)
+    assert Schema.make(int) is not Schema.make(int, description='Count')
+    assert Schema.make(str).serialize() == {'type': 'string'}
+
+
+def test_definitions_are_slotted():
+    assert not hasattr(Schema.make(Leaf), '__dict__')
+    assert not hasattr(Reference('#/components/schemas/Leaf'), '__dict__')
+
+
+def test_serialization_is_cached():
+    inner = Object({'name': Schema.make(str)})
+    outer = Object({'inner': inner, 'count': Schema.make(int)})
+    first = outer.serialize()
+
+    assert outer.serialize() is first
+    assert first['properties']['inner'] is inner.serialize()
+
+    inner.update(description='Changed')
+    second = outer.serialize()
+
+    assert second is not first
+    assert second['properties']['inner']['description'] == 'Changed'
+    assert second['properties']['count'] is first['properties']['count']
+
+
+def test_shared_primitives_are_frozen():
+    with pytest.raises(TypeError):
+        Schema.make(int).update(description='Count')
+
+
+def test_model_caches_are_weak():
+    class Temporary:
+        name = str
+
+    Schema.make(Temporary)
+    reference = ref(Temporary)
+
+    del Temporary
+    gc.collect()
+
+    assert reference() is None
+
+
+def test_guard_uses_cached_fields(monkeypatch):
+    class Guarded(Schema):
+        __slots__ = ()
+
+        extra: str
+
+    calls = []
+    hints = types._type_hints
+    monkeypatch.setattr(types, '_type_hints', lambda cls: calls.append(cls) or hints(cls))
+
+    first = Guarded(title='First', extra='kept', unknown='dropped', **{'x-vendor': 1})
+    second = Guarded(title='Second', unknown='dropped')
+
+    assert first.fields == {'title': 'First', 'extra': 'kept', 'x-vendor': 1}
+    assert second.fields == {'title': 'Second'}
+    assert calls == [Guarded]
+    assert types._allowed_cache[Guarded] == frozenset(hints(Guarded))
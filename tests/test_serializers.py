@@ -0,0 +1,88 @@
+import datetime
+import pytest
+
+from decimal import Decimal
+
+from sanic import Sanic
+from sanic_openapi3 import blueprint, openapi
+from sanic_openapi3.serializers import compile_encoder
+
+
+class Item:
+    id = int
+    name = str
+    price = float
+    created = datetime.date
+    tags = [str]
+
+
+def test_compile_encoder():
+    encode = compile_encoder({'type': 'object', 'properties': {'b': {'type': 'integer'}, 'a': {'type': 'string'}}})
+
+    assert encode({'a': 'x"', 'b': 1, 'c': 2}) == b'{"b":1,"a":"x\\""}'
+    assert encode({'a': None}) == b'{"a":null}'
+
+
+def test_compile_encoder_refs():
+    node = {'type': 'object', 'properties': {'children': {'type': 'array', 'items': {'$ref': '#/components/schemas/Node'}}}}
+    encode = compile_encoder({'$ref': '#/components/schemas/Node'}, {'Node': node})
+
+    assert encode({'children': [{'children': [], 'x': 1}]}) == b'{"children":[{"children":[]}]}'
+
+
+def test_compile_encoder_types():
+    encode = compile_encoder({'type': 'object', 'properties': {
+        'i': {'type': 'integer'},
+        'n': {'type': 'number'},
+        'b': {'type': 'boolean'},
+        's': {'type': 'string'},
+        'a': {'type': 'array', 'items': {'type': 'string'}},
+    }})
+
+    assert encode({'i': 1.9, 'b': 'no', 's': 5, 'a': 'xy'}) == b'{"i":1.9,"b":"no","s":5,"a":"xy"}'
+    assert encode({'i': True, 'n': 2, 'b': False, 's': 'x', 'a': ('x',)}) == b'{"i":true,"n":2,"b":false,"s":"x","a":["x"]}'
+
+    with pytest.raises(ValueError):
+        encode({'n': float('nan')})
+
+    with pytest.raises(TypeError):
+        encode({'n': Decimal('1.5')})
+
+
+def test_respond():
+    app = Sanic('test_respond')
+    app.blueprint(blueprint)
+
+    @app.get('/item')
+    @openapi.response(200, Item)
+    async def item(request):
+        return openapi.respond(request, 200, {
+            'tags': ['a'],
+            'secret': 'hidden',
+            'id': 1,
+            'name': 'Item',
+            'price': 1.5,
+            'created': datetime.date(2018, 12, 31),
+        })
+
+    request, response = app.test_client.get('/item')
+    assert response.status == 200
+    assert response.content_type == 'application/json'
+    assert response.body == b'{"id":1,"name":"Item","price":1.5,"created":"2018-12-31","tags":["a"]}'
+
+
+def test_respond_spec_file(tmpdir):
+    path = tmpdir.join('openapi.json')
+    path.write('{"openapi": "3.0.0", "paths": {}}')
+
+    app = Sanic('test_respond_spec_file')
+    app.config.OPENAPI_SPEC_FILE = str(path)
+    app.blueprint(blueprint)
+
+    @app.get('/item')
+    @openapi.response(200, Item)
+    async def item(request):
+        return openapi.respond(request, 200, {'id': 1, 'secret': 'hidden'})
+
+    request, response = app.test_client.get('/item')
+    assert response.body == b'{"id":1}'
@@ -0,0 +1,58 @@
+from json import loads
+from sanic_openapi3.slices import SpecIndex
+
+SPEC = {
+    'openapi': '3.0.0',
+    'info': {'title': 'API', 'version': '1.0.0'},
+    'tags': [{'name': 'pets'}, {'name': 'users'}],
+    'paths': {
+        '/pets': {
+            'get': {'tags': ['pets'], 'responses': {'200': {'content': {'application/json': {'schema': {'$ref': '#/components/schemas/Pet'}}}}}},
+        },
+        '/users': {
+            'get': {'tags': ['users'], 'security': [{'token': []}], 'responses': {}},
+            'post': {'tags': ['users', 'pets'], 'responses': {}},
+        },
+    },
+    'components': {
+        'schemas': {
+            'Pet': {'type': 'object', 'properties': {'owner': {'$ref': '#/components/schemas/User'}}},
+            'User': {'type': 'object', 'properties': {'name': {'type': 'string'}}},
+            'Unused': {'type': 'object'},
+        },
+        'securitySchemes': {'token': {'type': 'http', 'scheme': 'bearer'}},
+    },
+}
+
+
+def test_slice_by_tag():
+    index = SpecIndex(lambda: SPEC)
+    spec = loads(index.slice('pets').body)
+
+    assert spec['paths'] == {'/pets': SPEC['paths']['/pets'], '/users': {'post': SPEC['paths']['/users']['post']}}
+    assert spec['tags'] == [{'name': 'pets'}, {'name': 'users'}]
+    assert set(spec['components']['schemas']) == {'Pet', 'User'}
+    assert spec['components']['securitySchemes'] == {}
+
+
+def test_slice_by_path():
+    index = SpecIndex(lambda: SPEC)
+    spec = loads(index.slice(path='/users').body)
+
+    assert set(spec['paths']['/users']) == {'get', 'post'}
+    assert spec['components']['schemas'] == {}
+    assert set(spec['components']['securitySchemes']) == {'token'}
+
+    assert set(loads(index.slice('users', '/users').body)['paths']['/users']) == {'get', 'post'}
+    assert set(loads(index.slice('pets', '/users').body)['paths']['/users']) == {'post'}
+
+
+def test_slice_cached():
+    calls = []
+    index = SpecIndex(lambda: calls.append(1) or SPEC)
+
+    assert index.slice('pets') is index.slice('pets')
+    assert index.slice('users') is not None
+    assert index.slice('missing') is None
+    assert index.slice(path='/missing') is None
+    assert calls == [1]
@@ -0,0 +1,37 @@
+import datetime
+
+from sanic_openapi3.definitions import Response, Parameter
+from sanic_openapi3.documents import encode
+from sanic_openapi3.encoders import get_encoder
+from sanic_openapi3.streaming import iterencode
+from sanic_openapi3.types import _serialize
+
+
+class Pet:
+    name = str
+    tags = [str]
+
+
+def test_iterencode_matches_encode():
+    value = {
+        200: Response.make(Pet, 'A "pet"'),
+        'parameters': [Parameter.make('id', int, 'path')],
+        'empty': {'list': [], 'dict': {}},
+        'scalars': [True, None, 1.5, 'ü'],
+    }
+
+    assert b''.join(iterencode(value)) == encode(_serialize(value))
+
+
+def test_iterencode_chunks():
+    chunks = list(iterencode([Response.make(Pet)] * 50, chunk_size=256))
+
+    assert len(chunks) > 1
+    assert all(len(x) >= 256 for x in chunks[:-1])
+
+
+def test_iterencode_dates():
+    value = {'created': datetime.date(2018, 12, 31), 'items': [datetime.datetime(2018, 12, 31, 12)]}
+
+    assert b''.join(iterencode(value)) == b'{"created":"2018-12-31","items":["2018-12-31T12:00:00"]}'
+    assert b''.join(iterencode(value, encoder=get_encoder('json'))) == encode(value, get_encoder('json'))
@@ -0,0 +1,52 @@
+from sanic import Sanic
+from sanic.response import json
+from sanic_openapi3 import blueprint, openapi
+from sanic_openapi3.types import String
+from sanic_openapi3.validation import compile_schema
+
+
+class Item:
+    name = String(minLength=2)
+    count = int
+    tags = [str]
+
+
+def test_compile_schema():
+    validate = compile_schema({'type': 'object', 'properties': {'id': {'type': 'integer', 'minimum': 1}}})
+
+    assert validate({'id': 1}) == []
+    assert validate({'id': 0}) == ['value.id: is less than 1']
+    assert validate({'id': '1'}) == ['value.id: expected integer']
+    assert validate([]) == ['value: expected object']
+
+
+def test_compile_schema_refs():
+    node = {'type': 'object', 'properties': {'children': {'type': 'array', 'items': {'$ref': '#/components/schemas/Node'}}}}
+    validate = compile_schema({'$ref': '#/components/schemas/Node'}, {'Node': node})
+
+    assert validate({'children': [{'children': []}]}) == []
+    assert validate({'children': [{'children': {}}]}) == ['value.children[0].children: expected array']
+
+
+def test_validate_request():
+    app = Sanic('test_validate_request')
+    app.blueprint(blueprint)
+
+    @app.post('/items')
+    @openapi.validate()
+    @openapi.parameter('limit', int, required=True)
+    @openapi.body({'application/json': Item})
+    async def create(request):
+        return json({'ok': True})
+
+    request, response = app.test_client.post('/items?limit=5', json={'name': 'ab', 'count': 1, 'tags': ['x']})
+    assert response.status == 200
+
+    request, response = app.test_client.post('/items?limit=x', json={'name': 'a', 'count': 1})
+    assert response.status == 400
+    assert 'query.limit: expected integer' in response.text
+    assert 'body.name: is shorter than 2' in response.text
+
+    request, response = app.test_client.post('/items', json={'name': 'ab', 'count': 1})
+    assert response.status == 400
+    assert 'query.limit: is required' in response.text